@@ -1,10 +1,13 @@
 from __future__ import annotations
 
+import bisect
 import json
 import math
 import os
 import re
+import threading
 import time
+from collections import deque
 import tkinter as tk
 import tkinter.ttk as ttk
 from tkinter import filedialog, messagebox, simpledialog
@@ -24,6 +27,7 @@ from utils import (
     sec_to_display,
     hhmmss_to_sec,
     imwrite_jp,
+    open_video_capture,
     ratio_value_from_str,
     ratio_label_from_wh,
     open_folder_with_selection,
@@ -39,7 +43,7 @@ from config import (
     normalize_presets,
     get_default_presets_with_labels,
 )
-from clipboard import copy_image_to_clipboard
+from clipboard import copy_image_to_clipboard, encode_clipboard_dib, set_clipboard_dib
 from seekbar import SeekbarMixin
 from crop_handler import CropHandlerMixin
 from export import ExportMixin
@@ -62,6 +66,12 @@ class VideoCropperApp(SeekbarMixin, CropHandlerMixin, ExportMixin):
     MIN_W: int = 20
     MIN_H: int = 20
 
+    # クロップの Undo/Redo 履歴の最大保持数
+    UNDO_LIMIT: int = 200
+
+    # PNG連番出力の既定の圧縮レベル (zlib の圧縮が書き出し時間の大半を占めるため速度優先で低めにする)
+    DEFAULT_PNG_COMPRESSION: int = 1
+
     # シークバー設定
     SEEK_H: int = 100
     SEEK_MARGIN: int = 20
@@ -103,7 +113,7 @@ class VideoCropperApp(SeekbarMixin, CropHandlerMixin, ExportMixin):
         self.playing = False
         self.current_time = 0
         self.speed = float(self.global_config.get("play_speed", 1.0))
-        self.png_compression = int(self.global_config.get("png_compression", 3))
+        self.png_compression = int(self.global_config.get("png_compression", self.DEFAULT_PNG_COMPRESSION))
         self.video_filename = ""  # 動画ファイル名（拡張子除く）
         self.video_filepath = ""  # 動画ファイルのフルパス
         self.vid_w = 1920 # 初期値
@@ -136,9 +146,13 @@ class VideoCropperApp(SeekbarMixin, CropHandlerMixin, ExportMixin):
         self.play_range_mode = False  # 区間再生モード
         self.check_duplicate = None  # 直前に出力したフレームと同一のとき出力しない
 
-        # クロップの Undo スタック（メモリのみ、無制限）
-        self.crop_history = []
-        self.crop_redo = []
+        # Undo/Redo ボタンに最後に設定した状態（変化がなければ Tk を呼ばない）
+        self._undo_btn_state = None
+        self._redo_btn_state = None
+
+        # クロップの Undo スタック（メモリのみ、UNDO_LIMIT を超えた古いものから破棄）
+        self.crop_history: deque[tuple[int, int, int, int]] = deque(maxlen=self.UNDO_LIMIT)
+        self.crop_redo: deque[tuple[int, int, int, int]] = deque(maxlen=self.UNDO_LIMIT)
 
         # 解像度プリセット (name -> (w,h))
         self.resolution_presets = {}
@@ -527,6 +541,8 @@ class VideoCropperApp(SeekbarMixin, CropHandlerMixin, ExportMixin):
         self.btn_redo = tk.Button(sec1, text="↪️", command=self.redo_crop, width=5, font=("Segoe UI Emoji", 11), bg=self.theme.get("button_redo_bg"), relief=tk.RAISED)
         self.btn_redo.pack(side=tk.LEFT, padx=1, fill=tk.Y)
         self.btn_redo.config(state=tk.DISABLED)
+        # 作成直後の状態を記録（_set_undo_redo_button_state の変化判定用）
+        self._undo_btn_state = self._redo_btn_state = tk.DISABLED
         self.add_tooltip(self.btn_redo, "Ctrl+Y: 進む")
 
         ttk.Separator(self.crop_hbox, orient=tk.VERTICAL).pack(side=tk.LEFT, fill=tk.Y, padx=10)
@@ -819,7 +835,7 @@ class VideoCropperApp(SeekbarMixin, CropHandlerMixin, ExportMixin):
 
         # 各種変数の反映
         if hasattr(self, 'compression_var'):
-            self.compression_var.set(str(self.global_config.get("png_compression", 3)))
+            self.compression_var.set(str(self.global_config.get("png_compression", self.DEFAULT_PNG_COMPRESSION)))
             self.png_compression = int(self.compression_var.get())
         if hasattr(self, 'check_prev_next'):
             self.check_prev_next.set(self.global_config.get("check_prev_next", True))
@@ -858,7 +874,7 @@ class VideoCropperApp(SeekbarMixin, CropHandlerMixin, ExportMixin):
         if self.cap:
             self.cap.release()
         
-        self.cap = cv2.VideoCapture(video_file)
+        self.cap = open_video_capture(video_file)
         if not self.cap.isOpened():
             return False
 
@@ -955,7 +971,7 @@ class VideoCropperApp(SeekbarMixin, CropHandlerMixin, ExportMixin):
             config['selected_ratio'] = self.ratio_var.get()
 
         # 追加の設定項目
-        config["png_compression"] = int(self.compression_var.get()) if hasattr(self, 'compression_var') else 3
+        config["png_compression"] = int(self.compression_var.get()) if hasattr(self, 'compression_var') else self.DEFAULT_PNG_COMPRESSION
         config["check_prev_next"] = self.check_prev_next.get() if hasattr(self, 'check_prev_next') else True
         config["check_duplicate"] = self.check_duplicate.get() if hasattr(self, 'check_duplicate') else True
         config["play_speed"] = float(self.speed_var.get()) if hasattr(self, 'speed_var') else 1.0
@@ -1224,14 +1240,16 @@ class VideoCropperApp(SeekbarMixin, CropHandlerMixin, ExportMixin):
     # ------------------ クロップの Undo/Redo ------------------
     def push_crop_history(self):
         # 現在の crop_rect を履歴に積む（重複は省く）
-        cur = [int(v) for v in self.crop_rect]
-        if not self.crop_history or self.crop_history[-1] != cur:
-            self.crop_history.append(cur)
+        # 履歴はタプルで持ち、直前と同じなら新たなオブジェクトを積まない
+        history = self.crop_history
+        cur = tuple(map(int, self.crop_rect))
+        if not history or history[-1] != cur:
+            history.append(cur)
         # 新たな変更が入ったら redo 履歴はクリア
         try:
             self.crop_redo.clear()
         except Exception:
-            self.crop_redo = []
+            self.crop_redo = deque(maxlen=self.UNDO_LIMIT)
         self.update_undo_button_state()
 
     def undo_crop(self, event=None):
@@ -1239,10 +1257,8 @@ class VideoCropperApp(SeekbarMixin, CropHandlerMixin, ExportMixin):
         if not self.crop_history:
             return
         # 現在状態を redo に退避
-        cur = [int(v) for v in self.crop_rect]
-        self.crop_redo.append(cur)
-        last = self.crop_history.pop()
-        self.crop_rect = last
+        self.crop_redo.append(tuple(map(int, self.crop_rect)))
+        self.crop_rect = list(self.crop_history.pop())
         # 矩形をキャンバスに反映し、角ハンドルも更新
         self._sync_crop_rect_ui()
         self.update_undo_button_state()
@@ -1252,28 +1268,17 @@ class VideoCropperApp(SeekbarMixin, CropHandlerMixin, ExportMixin):
         if not getattr(self, 'crop_redo', None):
             return
         # 現在状態を undo 履歴に保存
-        cur = [int(v) for v in self.crop_rect]
-        self.crop_history.append(cur)
-        nxt = self.crop_redo.pop()
-        self.crop_rect = nxt
+        self.crop_history.append(tuple(map(int, self.crop_rect)))
+        self.crop_rect = list(self.crop_redo.pop())
         # 矩形をキャンバスに反映し、角ハンドルも更新
         self._sync_crop_rect_ui()
         self.update_undo_button_state()
 
     def update_undo_button_state(self):
-        try:
-            if hasattr(self, 'btn_undo'):
-                if self.crop_history:
-                    self.btn_undo.config(state=tk.NORMAL)
-                else:
-                    self.btn_undo.config(state=tk.DISABLED)
-            if hasattr(self, 'btn_redo'):
-                if getattr(self, 'crop_redo', None):
-                    self.btn_redo.config(state=tk.NORMAL)
-                else:
-                    self.btn_redo.config(state=tk.DISABLED)
-        except Exception:
-            pass
+        self._set_undo_redo_button_state(
+            tk.NORMAL if self.crop_history else tk.DISABLED,
+            tk.NORMAL if getattr(self, 'crop_redo', None) else tk.DISABLED,
+        )
 
     # ------------------ ツールチップ ------------------
     def add_tooltip(self, widget, text):
@@ -1446,15 +1451,30 @@ class VideoCropperApp(SeekbarMixin, CropHandlerMixin, ExportMixin):
             history_manager = overlay_utils.InputHistoryManager()
             self._draw_overlay_on_image(pil, self.current_time, history_manager, 0, vx1, vy1)
 
-            ok = self._copy_image_to_clipboard(pil)
-            if ok:
-                # 視覚的なフィードバック（フラッシュ＆メッセージ）
-                self._show_copy_feedback()
-            else:
-                messagebox.showerror('Error', 'クリップボードへ画像をコピーできませんでした')
+            # 大きな画像では BMP 変換に時間がかかるため別スレッドで行い、
+            # クリップボードへの書き込みだけをメインスレッドに戻して行う
+            def _encode():
+                try:
+                    data = encode_clipboard_dib(pil)
+                except Exception as e:
+                    # e は except ブロックを抜けると消えるため、メッセージはここで確定させる
+                    msg = f'コピーに失敗しました:\n{e}'
+                    self.root.after(0, lambda m=msg: messagebox.showerror('Error', m))
+                    return
+                self.root.after(0, lambda: self._finish_copy_to_clipboard(data))
+
+            threading.Thread(target=_encode, daemon=True).start()
         except Exception as e:
             messagebox.showerror('Error', f'コピーに失敗しました:\n{e}')
 
+    def _finish_copy_to_clipboard(self, data: bytes):
+        """エンコード済みの画像をクリップボードに設定し、結果を表示する."""
+        if set_clipboard_dib(data):
+            # 視覚的なフィードバック（フラッシュ＆メッセージ）
+            self._show_copy_feedback()
+        else:
+            messagebox.showerror('Error', 'クリップボードへ画像をコピーできませんでした')
+
     def _show_copy_feedback(self):
         """コピー時のフラッシュ効果とメッセージ表示を行う（改善版）."""
         # 1. クロップ範囲のキャンバス座標を計算
@@ -1647,8 +1667,10 @@ class VideoCropperApp(SeekbarMixin, CropHandlerMixin, ExportMixin):
         self.resolution_optionmenu.config(state=state)
         self.entry_crop_w.config(state=state)
         self.entry_crop_h.config(state=state)
-        self.btn_undo.config(state=state if self.crop_history else tk.DISABLED)
-        self.btn_redo.config(state=state if self.crop_redo else tk.DISABLED)
+        self._set_undo_redo_button_state(
+            state if self.crop_history else tk.DISABLED,
+            state if self.crop_redo else tk.DISABLED,
+        )
         self.btn_save_preset.config(state=state)
         self.btn_delete_preset.config(state=state)
         
@@ -1823,8 +1845,8 @@ class VideoCropperApp(SeekbarMixin, CropHandlerMixin, ExportMixin):
             self.png_compression = max(0, min(9, val))
         except Exception as e:
             print(f"Compression Error: {e}")
-            self.png_compression = 3
-            self.compression_var.set("3")
+            self.png_compression = self.DEFAULT_PNG_COMPRESSION
+            self.compression_var.set(str(self.DEFAULT_PNG_COMPRESSION))
         finally:
             try:
                 self.root.focus_set()
@@ -2274,6 +2296,8 @@ class VideoCropperApp(SeekbarMixin, CropHandlerMixin, ExportMixin):
                                 self.trajectory_data.append((t, x, y, click, keys))
                             except:
                                 pass
+                # オーバーレイの検索は時刻の二分探索で行うため、時刻順に揃えておく (安定ソート)
+                self.trajectory_data.sort(key=lambda row: row[0])
             except Exception as e:
                 print(f"TSV読込エラー: {e}")
 
@@ -2296,14 +2320,20 @@ class VideoCropperApp(SeekbarMixin, CropHandlerMixin, ExportMixin):
             return
 
         # --- 1. マウス軌跡のオーバーレイ (現在の時刻に最も近いデータ) ---
+        # 時刻が current_time ± 1フレーム以内の最初の行を二分探索で探す
         mouse_data = None
         current_row_idx = -1
-        for i, row in enumerate(self.trajectory_data):
-            t, x, y, click, keys = row
-            if abs(t - self.current_time) < (1.0 / self.fps):
-                mouse_data = row
-                current_row_idx = i
-                break
+        # 該当する行が無い時刻は入力なしとして字幕履歴を更新する
+        click = keys = "None"
+        ts, release_idx, release_type = self._get_trajectory_columns()
+        tol = 1.0 / self.fps
+        i = bisect.bisect_right(ts, self.current_time - tol)
+        # 浮動小数の丸めで境界の行を取りこぼさないよう、条件を満たす範囲の先頭まで戻る
+        while i > 0 and abs(ts[i - 1] - self.current_time) < tol:
+            i -= 1
+        if i < len(ts) and abs(ts[i] - self.current_time) < tol:
+            mouse_data = self.trajectory_data[i]
+            current_row_idx = i
         
         if mouse_data:
             t_curr, x, y, click, keys = mouse_data
@@ -2312,17 +2342,13 @@ class VideoCropperApp(SeekbarMixin, CropHandlerMixin, ExportMixin):
             ripple_age = 0.0
             ripple_type = ""
             lookback_sec = 0.5
-            if current_row_idx > 0:
-                for i in range(current_row_idx, 0, -1):
-                    t_c, c_c = self.trajectory_data[i][0], self.trajectory_data[i][3]
-                    t_p, c_p = self.trajectory_data[i-1][0], self.trajectory_data[i-1][3]
-                    if t_curr - t_c > lookback_sec: break
-                    for btn_char, btn_name in [("L", "left"), ("R", "right"), ("M", "middle")]:
-                        if btn_char in c_p and btn_char not in c_c:
-                            ripple_type = btn_name
-                            ripple_age = t_curr - t_c
-                            break
-                    if ripple_type: break
+            # 直近でクリックを離した行 (現在行以前) を二分探索で探す
+            j = bisect.bisect_right(release_idx, current_row_idx) - 1
+            if j >= 0:
+                t_c = ts[release_idx[j]]
+                if t_curr - t_c <= lookback_sec:
+                    ripple_type = release_type[j]
+                    ripple_age = t_curr - t_c
 
             overlay_utils.draw_mouse_overlay(
                 img, x, y, click, 
@@ -5,7 +5,7 @@ Windows環境での画像クリップボードコピー機能を提供。
 from __future__ import annotations
 
 import ctypes
-import io
+import struct
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -18,6 +18,41 @@ def copy_image_to_clipboard(pil_img: "Image.Image") -> bool:
     Args:
         pil_img: コピーするPIL Image オブジェクト
         
+    Returns:
+        成功した場合True、失敗した場合False
+    """
+    try:
+        data = encode_clipboard_dib(pil_img)
+    except Exception as e:
+        print(f"Clipboard copy failed: {e}")
+        return False
+    return set_clipboard_dib(data)
+
+
+def encode_clipboard_dib(pil_img: "Image.Image") -> bytes:
+    """PIL画像を CF_DIB 形式 (BITMAPFILEHEADER を除いた BMP) のバイト列にする.
+
+    クリップボードを触らないため、ワーカースレッドから呼び出してよい。
+    BMP エンコーダ (BytesIO 経由) を使わず、ヘッダを直接組み立てて画素を1回で書き出す。
+    """
+    if pil_img.mode != 'RGB':
+        pil_img = pil_img.convert('RGB')
+    width, height = pil_img.size
+    # 24bit DIB: 各行は4バイト境界に揃え、下の行から並べる (BGR)
+    stride = (width * 3 + 3) & ~3
+    pixels = pil_img.tobytes('raw', 'BGR', stride, -1)
+    # BITMAPINFOHEADER (biSize, biWidth, biHeight, biPlanes, biBitCount, biCompression=BI_RGB,
+    #                   biSizeImage, biXPelsPerMeter, biYPelsPerMeter, biClrUsed, biClrImportant)
+    header = struct.pack('<IiiHHIIiiII', 40, width, height, 1, 24, 0, len(pixels), 0, 0, 0, 0)
+    return header + pixels
+
+
+def set_clipboard_dib(data: bytes) -> bool:
+    """CF_DIB 形式のバイト列をクリップボードに設定する.
+
+    Args:
+        data: encode_clipboard_dib で作成したバイト列
+
     Returns:
         成功した場合True、失敗した場合False
     """
@@ -25,10 +60,6 @@ def copy_image_to_clipboard(pil_img: "Image.Image") -> bool:
     try:
         import win32clipboard
         import win32con
-        output = io.BytesIO()
-        pil_img.convert('RGB').save(output, 'BMP')
-        data = output.getvalue()[14:]
-        output.close()
         win32clipboard.OpenClipboard()
         try:
             win32clipboard.EmptyClipboard()
@@ -41,11 +72,6 @@ def copy_image_to_clipboard(pil_img: "Image.Image") -> bool:
 
     # Fallback to ctypes on Windows to set CF_DIB data (BMP without BITMAPFILEHEADER)
     try:
-        output = io.BytesIO()
-        pil_img.convert('RGB').save(output, 'BMP')
-        data = output.getvalue()[14:]
-        output.close()
-
         GMEM_MOVEABLE = 0x0002
         CF_DIB = 8
         kernel32 = ctypes.windll.kernel32
@@ -4,59 +4,297 @@
 """
 from __future__ import annotations
 
+import copy
+import functools
+import hashlib
 import json
+import mmap
 import os
+import sys
+import threading
 from typing import TYPE_CHECKING, Any
 
 from utils import get_base_dir, ratio_label_from_wh
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # 定数
 PROJECT_NAME = "ChulipVideo"
 
 # 設定ファイル名を定数化
 CONFIG_FILENAME = f"{PROJECT_NAME}_config.json"
 
-# デフォルト解像度プリセット
-DEFAULT_PRESETS = {
-    "160×120（カスタム）": [160, 120],
-    "320×240（QVGA）": [320, 240],
-    "480×320（HVGA）": [480, 320],
-    "640×480（VGA）": [640, 480],
-    "800×600（SVGA）": [800, 600],
-    "1024×768（XGA）": [1024, 768],
-    "1600×1200（UXGA）": [1600, 1200],
-    "426×240（SD 240p）": [426, 240],
-    "640×360（SD 360p）": [640, 360],
-    "854×480（SD 480p）": [854, 480],
-    "1280×720（HD 720p）": [1280, 720],
-    "1366×768（WXGA）": [1366, 768],
-    "1920×1080（FHD 1080p）": [1920, 1080],
-    "2560×1440（2K 1440p）": [2560, 1440],
-    "3840×2160（4K 2160p）": [3840, 2160],
-    "1080×1080（Instagram Feed）": [1080, 1080],
-    "1080×1920（Instagram Story）": [1080, 1920],
-    "1080×1920（TikTok）": [1080, 1920],
-    "1280×720（YouTube Thumbnail）": [1280, 720],
-    "1500×500（Twitter ヘッダー画像）": [1500, 500],
-    "400×400（Twitterプロフィール画像)": [400, 400],
-    "1200×675（Twitter 通常投稿・横長)": [1200, 675],
-    "1200×1200（Twitter 通常投稿・正方形)": [1200, 1200],
-    "1200×1500（Twitter 通常投稿・縦長)": [1200, 1500],
-    "1600×900（Twitter リンクカード大）": [1600, 900],
-    "800×800（Twitter リンクカード小）": [800, 800],
-    "1080×1080（Twitter 広告・正方形）": [1080, 1080],
-    "1920×1080（Twitter 広告・横長）": [1920, 1080],
-    "1200×628（Facebook Post）": [1200, 628],
-    "1080×1920（YouTube Short）": [1080, 1920],
-    "1080×1920（縦FHD 1080p）": [1080, 1920],
-    "32×32（1:1 アイコン）": [32, 32],
-    "1080×1080（1:1）": [1080, 1080],
+# デフォルト解像度プリセット (名前, 幅, 高さ)
+_DEFAULT_PRESETS_RAW: tuple[tuple[str, int, int], ...] = (
+    ("160×120（カスタム）", 160, 120),
+    ("320×240（QVGA）", 320, 240),
+    ("480×320（HVGA）", 480, 320),
+    ("640×480（VGA）", 640, 480),
+    ("800×600（SVGA）", 800, 600),
+    ("1024×768（XGA）", 1024, 768),
+    ("1600×1200（UXGA）", 1600, 1200),
+    ("426×240（SD 240p）", 426, 240),
+    ("640×360（SD 360p）", 640, 360),
+    ("854×480（SD 480p）", 854, 480),
+    ("1280×720（HD 720p）", 1280, 720),
+    ("1366×768（WXGA）", 1366, 768),
+    ("1920×1080（FHD 1080p）", 1920, 1080),
+    ("2560×1440（2K 1440p）", 2560, 1440),
+    ("3840×2160（4K 2160p）", 3840, 2160),
+    ("1080×1080（Instagram Feed）", 1080, 1080),
+    ("1080×1920（Instagram Story）", 1080, 1920),
+    ("1080×1920（TikTok）", 1080, 1920),
+    ("1280×720（YouTube Thumbnail）", 1280, 720),
+    ("1500×500（Twitter ヘッダー画像）", 1500, 500),
+    ("400×400（Twitterプロフィール画像)", 400, 400),
+    ("1200×675（Twitter 通常投稿・横長)", 1200, 675),
+    ("1200×1200（Twitter 通常投稿・正方形)", 1200, 1200),
+    ("1200×1500（Twitter 通常投稿・縦長)", 1200, 1500),
+    ("1600×900（Twitter リンクカード大）", 1600, 900),
+    ("800×800（Twitter リンクカード小）", 800, 800),
+    ("1080×1080（Twitter 広告・正方形）", 1080, 1080),
+    ("1920×1080（Twitter 広告・横長）", 1920, 1080),
+    ("1200×628（Facebook Post）", 1200, 628),
+    ("1080×1920（YouTube Short）", 1080, 1920),
+    ("1080×1920（縦FHD 1080p）", 1080, 1920),
+    ("32×32（1:1 アイコン）", 32, 32),
+    ("1080×1080（1:1）", 1080, 1080),
+)
+
+DEFAULT_PRESETS = {name: [w, h] for name, w, h in _DEFAULT_PRESETS_RAW}
+
+
+# 読み込み結果のキャッシュ (ファイルの (st_mtime_ns, st_size), データ)
+_CFG_CACHE: tuple[tuple[int, int], dict[str, Any]] | None = None
+_VIDEO_SETTINGS_CACHE: dict[str, tuple[tuple[int, int], dict[str, Any]]] = {}
+
+
+def _stat_key(path: str) -> tuple[int, int] | None:
+    """キャッシュ判定用にファイルの (st_mtime_ns, st_size) を返す. 存在しなければ None。"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+# グローバル設定の保存を直列化するロックと保存世代
+# (読み込み時の補完結果を裏で書き戻す際、後から行われた通常保存を上書きしないため)
+_SAVE_LOCK = threading.Lock()
+_SAVE_GENERATION = 0
+
+# 最後に書き込んだ内容のハッシュ (パス -> (ダイジェスト, 書き込み直後の stat))
+_LAST_SAVED_HASH: dict[str, tuple[bytes, tuple[int, int] | None]] = {}
+
+
+def _write_bytes_if_changed(path: str, payload: bytes) -> None:
+    """内容が前回書き込み時と同じなら何もせず、変わっていれば一時ファイル経由で置き換える.
+
+    途中で強制終了されても元のファイルが壊れないよう os.replace で差し替える。
+    失敗時は例外をそのまま送出する。
+    """
+    digest = hashlib.blake2b(payload, digest_size=8).digest()
+    last = _LAST_SAVED_HASH.get(path)
+    if last is not None and last[0] == digest and last[1] == _stat_key(path):
+        return
+
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        _LAST_SAVED_HASH.pop(path, None)
+        raise
+    _LAST_SAVED_HASH[path] = (digest, _stat_key(path))
+
+
+def _read_file_bytes(path: str) -> bytes:
+    """ファイル全体をバイト列で読み込む. fstat のサイズで一度に読み、足りなければ続きを読む。"""
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        size = os.fstat(fd).st_size
+        data = os.read(fd, size) if size > 0 else b""
+        if len(data) < size:
+            chunks = [data]
+            while True:
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+            data = b"".join(chunks)
+        return data
+    finally:
+        os.close(fd)
+
+
+# これ以上のサイズのJSONは (orjson があれば) mmap から直接デコードする
+_MMAP_MIN_SIZE = 64 * 1024
+
+
+def _load_json_file(path: str) -> Any:
+    """JSONファイルを読み込んでデコードする.
+
+    orjson が使えてファイルが大きい場合はマップした領域をそのまま渡し、bytes へのコピーを省く。
+    小さいファイルは mmap の準備の方が高くつくため通常の読み込みを使う。
+    """
+    if orjson is not None:
+        fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        try:
+            if os.fstat(fd).st_size >= _MMAP_MIN_SIZE:
+                with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+                    with memoryview(mm) as view:
+                        return orjson.loads(view)
+        finally:
+            os.close(fd)
+    return _json_loads(_read_file_bytes(path))
+
+
+def _json_loads(data: bytes) -> Any:
+    """JSONバイト列をデコードする. orjson があれば優先して使う。"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data.decode("utf-8"))
+
+
+def _json_dumps(obj: Any) -> bytes:
+    """オブジェクトをインデント付きJSONバイト列にする（UTF-8, 非ASCIIはそのまま）."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+# 設定の既定値. 読み込み時の補完にだけ使い、直接は変更しないこと
+# (補完で採用した値は呼び出し側が編集できるよう複製してから渡す)
+_THEME_DEFAULTS: dict[str, Any] = {
+    "theme": {
+        "main_color": "#ffcccc",
+        "active_color": "#ff9999",
+        "crop_width": 2,
+        
+        # 背景色
+        "canvas_bg": "#f5f5f5",
+        
+        # クロップ枠線の設定 (命名規則: crop_[状態]_[linecolor/linestyle])
+        "crop_default_linecolor": "#FF8C00", # 橙
+        "crop_default_linestyle": (5, 5),
+        "crop_focused_linecolor": "#FF0000",   # 赤
+        "crop_focused_linestyle": "",          # 実線
+        "crop_hover_linecolor": "#FF0000",     # 赤
+        "crop_hover_linestyle": (5, 5),        # 破線
+        
+        # 四つ角のドット設定
+        "handle_color": "#FFFFFF",
+        "handle_size": 8,
+        "edge_margin": 20,
+        
+        # ボタンの色 (パステル配色)
+        "button_play_bg": "#B3E5FC",    # 薄い青 (button_undo_bgと共通)
+        "button_stop_bg": "#EF9A9A",    # 薄い赤
+        "button_export_bg": "#F48FB1",  # 薄いピンク
+        "button_video_bg": "#81C784",   # パステル緑
+        "button_gif_bg": "#FFCC80",     # 薄い橙
+        "button_copy_bg": "#80DEEA",    # 薄いシアン
+        "button_normal_bg": "#E0E0E0",  # 明るいグレー
+        
+        # 追加ボタンの色
+        "button_help_bg": "#FFF59D",    # 薄い黄色
+        "button_reload_bg": "#FFCC80",  # 薄いオレンジ
+        "button_save_bg": "#90CAF9",    # 薄い青色
+        "button_trim_start_bg": "#77BB77", # 開始色 (start_color_bgと共通)
+        "button_trim_end_bg": "#FF7777",   # 終了色 (end_color_bgと共通)
+        "button_undo_bg": "#B3E5FC",    # 薄い青
+        "button_redo_bg": "#B3E5FC",    # 薄い青
+        "button_locked_bg": "#FFAB91",   # 薄い赤（ロック中）
+        "button_unlocked_bg": "#B9F6CA", # 薄い緑（解除中）
+        "start_color_bg": "#77BB77",     # 開始カラー
+        "end_color_bg": "#FF7777",       # 終了カラー
+
+        # マウス軌跡オーバーレイ設定
+        "mouse_overlay": {
+            # ポインタ（通常時）の設定
+            "pointer": {
+                "shape": "cursor",        # ポインタ位置を示す形状 (circle, square, cursor)
+                "color": "#000000",       # ポインタの罫線の色 (既定: 黒)
+                "width": 2,               # ポインタの罫線の太さ
+                "fill": "",               # ポインタの塗りつぶしの色（空文字なら透明）
+                "radius": 6               # ポインタの半径/サイズ
+            },
+            # 左クリック時の設定
+            "click_left": {
+                "color": "#FF0000",       # 左クリック時の強調色 (既定: 赤)
+                "shape": "circle",        # 左クリック時の形状
+                "width": 3,               # 左クリック時の太さ
+                "ripple_duration": 0.5,   # 左クリックを離した時の波紋が消えるまでの時間（秒）
+                "ripple_range": 20        # 左クリックを離した時の波紋の広がる範囲（ピクセル）
+            },
+            # 右クリック時の設定
+            "click_right": {
+                "color": "#0000FF",       # 右クリック時の強調色 (既定: 青)
+                "shape": "circle",        # 右クリック時の形状
+                "width": 3,               # 右クリック時の太さ
+                "ripple_duration": 0.5,   # 右クリックを離した時の波紋が消えるまでの時間（秒）
+                "ripple_range": 20        # 右クリックを離した時の波紋の広がる範囲（ピクセル）
+            },
+            # 中クリック時の設定
+            "click_middle": {
+                "color": "#00FF00",       # 中クリック時の強調色 (既定: 緑)
+                "shape": "circle",        # 中クリック時の形状
+                "width": 3,               # 中クリック時の太さ
+                "ripple_duration": 0.5,   # 中クリックを離した時の波紋が消えるまでの時間（秒）
+                "ripple_range": 20        # 中クリックを離した時の波紋の広がる範囲（ピクセル）
+            }
+        },
+        
+        # 入力（キー・マウス操作）オーバーレイ設定
+        "input_overlay": {
+            "position": "center",         # 文字の位置（left, right, center）
+            "v_position": "bottom",       # 上下位置（top, center, bottom）
+            "font_family": "msgothic.ttc",# フォントの種類（msgothic.ttc, meiryo.ttc 等、OS標準フォント推奨）
+            "font_size": 24,              # 文字の大きさ
+            "font_weight": "bold",        # 文字の太さ
+            "font_color": "#000000",      # 文字の前景色
+            "outline_color": "",          # 文字のアウトライン色（空文字ならOFF）
+            "bg_color": "#FFFFFF",        # 入力を描く四角形の背景塗りつぶし色
+            "offset_x": 0,                # 表示領域の横オフセット
+            "offset_y": 0,                # 表示領域の縦オフセット
+            "text_offset_y": -2,          # 文字の描画位置の微調整（負の数で上に移動）
+            "max_stack": 3,               # 最大表示数
+            "fade_duration": 1.0          # 入力を離してから文字が消えるまでの時間（秒）
+        }
+    },
+    "window_x": None,
+    "window_y": None,
+    "window_width": 1000,
+    "window_height": 700,
+    "window_maximized": False,
+    "last_video_path": "",
+    "resolution_presets": {},
+    "selected_ratio": "未指定",
+    "png_compression": 1,
+    "check_prev_next": True,
+    "check_duplicate": True,
+    "play_speed": 1.0,
+    "play_range": False,
+    "play_loop": False,
+    "play_pingpong": False,
+    "show_trajectory": True
 }
 
 
+@functools.lru_cache(maxsize=None)
 def get_config_path() -> str:
-    """設定ファイルのパスを返す. 実行ファイルと同じディレクトリ。"""
-    import sys
+    """設定ファイルのパスを返す. 実行ファイルと同じディレクトリ。
+
+    プロセス中に変わらないため初回の結果をキャッシュする。
+    """
     # utils.get_base_dir() と同等のロジックで実行ファイルディレクトリを取得
     if getattr(sys, 'frozen', False):
         base_dir = os.path.dirname(sys.executable)
@@ -66,131 +304,24 @@ def get_config_path() -> str:
 
 
 def load_global_config() -> dict[str, Any]:
-    """グローバル設定ファイル（アプリ共通設定）を読み込む."""
+    """グローバル設定ファイル（アプリ共通設定）を読み込む.
+
+    ファイルが前回読み込み時から変わっていなければキャッシュのコピーを返す。
+    """
+    global _CFG_CACHE
     config_path = get_config_path()
-    theme_defaults = {
-        "theme": {
-            "main_color": "#ffcccc",
-            "active_color": "#ff9999",
-            "crop_width": 2,
-            
-            # 背景色
-            "canvas_bg": "#f5f5f5",
-            
-            # クロップ枠線の設定 (命名規則: crop_[状態]_[linecolor/linestyle])
-            "crop_default_linecolor": "#FF8C00", # 橙
-            "crop_default_linestyle": (5, 5),
-            "crop_focused_linecolor": "#FF0000",   # 赤
-            "crop_focused_linestyle": "",          # 実線
-            "crop_hover_linecolor": "#FF0000",     # 赤
-            "crop_hover_linestyle": (5, 5),        # 破線
-            
-            # 四つ角のドット設定
-            "handle_color": "#FFFFFF",
-            "handle_size": 8,
-            "edge_margin": 20,
-            
-            # ボタンの色 (パステル配色)
-            "button_play_bg": "#B3E5FC",    # 薄い青 (button_undo_bgと共通)
-            "button_stop_bg": "#EF9A9A",    # 薄い赤
-            "button_export_bg": "#F48FB1",  # 薄いピンク
-            "button_video_bg": "#81C784",   # パステル緑
-            "button_gif_bg": "#FFCC80",     # 薄い橙
-            "button_copy_bg": "#80DEEA",    # 薄いシアン
-            "button_normal_bg": "#E0E0E0",  # 明るいグレー
-            
-            # 追加ボタンの色
-            "button_help_bg": "#FFF59D",    # 薄い黄色
-            "button_reload_bg": "#FFCC80",  # 薄いオレンジ
-            "button_save_bg": "#90CAF9",    # 薄い青色
-            "button_trim_start_bg": "#77BB77", # 開始色 (start_color_bgと共通)
-            "button_trim_end_bg": "#FF7777",   # 終了色 (end_color_bgと共通)
-            "button_undo_bg": "#B3E5FC",    # 薄い青
-            "button_redo_bg": "#B3E5FC",    # 薄い青
-            "button_locked_bg": "#FFAB91",   # 薄い赤（ロック中）
-            "button_unlocked_bg": "#B9F6CA", # 薄い緑（解除中）
-            "start_color_bg": "#77BB77",     # 開始カラー
-            "end_color_bg": "#FF7777",       # 終了カラー
-
-            # マウス軌跡オーバーレイ設定
-            "mouse_overlay": {
-                # ポインタ（通常時）の設定
-                "pointer": {
-                    "shape": "cursor",        # ポインタ位置を示す形状 (circle, square, cursor)
-                    "color": "#000000",       # ポインタの罫線の色 (既定: 黒)
-                    "width": 2,               # ポインタの罫線の太さ
-                    "fill": "",               # ポインタの塗りつぶしの色（空文字なら透明）
-                    "radius": 6               # ポインタの半径/サイズ
-                },
-                # 左クリック時の設定
-                "click_left": {
-                    "color": "#FF0000",       # 左クリック時の強調色 (既定: 赤)
-                    "shape": "circle",        # 左クリック時の形状
-                    "width": 3,               # 左クリック時の太さ
-                    "ripple_duration": 0.5,   # 左クリックを離した時の波紋が消えるまでの時間（秒）
-                    "ripple_range": 20        # 左クリックを離した時の波紋の広がる範囲（ピクセル）
-                },
-                # 右クリック時の設定
-                "click_right": {
-                    "color": "#0000FF",       # 右クリック時の強調色 (既定: 青)
-                    "shape": "circle",        # 右クリック時の形状
-                    "width": 3,               # 右クリック時の太さ
-                    "ripple_duration": 0.5,   # 右クリックを離した時の波紋が消えるまでの時間（秒）
-                    "ripple_range": 20        # 右クリックを離した時の波紋の広がる範囲（ピクセル）
-                },
-                # 中クリック時の設定
-                "click_middle": {
-                    "color": "#00FF00",       # 中クリック時の強調色 (既定: 緑)
-                    "shape": "circle",        # 中クリック時の形状
-                    "width": 3,               # 中クリック時の太さ
-                    "ripple_duration": 0.5,   # 中クリックを離した時の波紋が消えるまでの時間（秒）
-                    "ripple_range": 20        # 中クリックを離した時の波紋の広がる範囲（ピクセル）
-                }
-            },
-            
-            # 入力（キー・マウス操作）オーバーレイ設定
-            "input_overlay": {
-                "position": "center",         # 文字の位置（left, right, center）
-                "v_position": "bottom",       # 上下位置（top, center, bottom）
-                "font_family": "msgothic.ttc",# フォントの種類（msgothic.ttc, meiryo.ttc 等、OS標準フォント推奨）
-                "font_size": 24,              # 文字の大きさ
-                "font_weight": "bold",        # 文字の太さ
-                "font_color": "#000000",      # 文字の前景色
-                "outline_color": "",          # 文字のアウトライン色（空文字ならOFF）
-                "bg_color": "#FFFFFF",        # 入力を描く四角形の背景塗りつぶし色
-                "offset_x": 0,                # 表示領域の横オフセット
-                "offset_y": 0,                # 表示領域の縦オフセット
-                "text_offset_y": -2,          # 文字の描画位置の微調整（負の数で上に移動）
-                "max_stack": 3,               # 最大表示数
-                "fade_duration": 1.0          # 入力を離してから文字が消えるまでの時間（秒）
-            }
-        },
-        "window_x": None,
-        "window_y": None,
-        "window_width": 1000,
-        "window_height": 700,
-        "window_maximized": False,
-        "last_video_path": "",
-        "resolution_presets": {},
-        "selected_ratio": "未指定",
-        "png_compression": 3,
-        "check_prev_next": True,
-        "check_duplicate": True,
-        "play_speed": 1.0,
-        "play_range": False,
-        "play_loop": False,
-        "play_pingpong": False,
-        "show_trajectory": True
-    }
+    stat_key = _stat_key(config_path)
+    if stat_key is not None and _CFG_CACHE is not None and _CFG_CACHE[0] == stat_key:
+        return copy.deepcopy(_CFG_CACHE[1])
 
     config_loaded = {}
     should_update_file = False
 
-    if os.path.exists(config_path):
+    if stat_key is not None:
         try:
-            if os.path.getsize(config_path) > 0:
-                with open(config_path, "r", encoding="utf-8") as f:
-                    config_loaded = json.load(f)
+            raw = _read_file_bytes(config_path)
+            if raw:
+                config_loaded = _json_loads(raw)
             else:
                 # 0バイトファイルは破損とみなして上書きフラグを立てる
                 should_update_file = True
@@ -211,58 +342,102 @@ def load_global_config() -> dict[str, Any]:
 
     # テーマ設定内の移行と補完
     loaded_theme = config_loaded.get("theme", {})
-    default_theme = theme_defaults["theme"]
+    default_theme = _THEME_DEFAULTS["theme"]
 
-    for old_key, new_key in migration_map.items():
-        if old_key in loaded_theme and new_key not in loaded_theme:
-            loaded_theme[new_key] = loaded_theme.pop(old_key)
-            should_update_file = True
+    # 旧キーが一つも無ければ（移行済みの通常ケース）ループ自体を省く。
+    # 複数の旧キーが同じ新キーに対応するため、移行順は migration_map の順を保つ
+    if loaded_theme.keys() & migration_map.keys():
+        for old_key, new_key in migration_map.items():
+            if old_key in loaded_theme and new_key not in loaded_theme:
+                loaded_theme[new_key] = loaded_theme.pop(old_key)
+                should_update_file = True
 
-    for k, v in default_theme.items():
-        if k not in loaded_theme:
-            loaded_theme[k] = v
-            should_update_file = True
-    
-    config_loaded["theme"] = loaded_theme
+    # 既定値に読み込んだ値を上書きマージする（キー数が増えたら新規項目あり）
+    merged_theme = default_theme | loaded_theme
+    if len(merged_theme) != len(loaded_theme):
+        should_update_file = True
+        for k in merged_theme.keys() - loaded_theme.keys():
+            merged_theme[k] = copy.deepcopy(merged_theme[k])
+    config_loaded["theme"] = merged_theme
 
-    # グローバル項目の補完
-    for k, v in theme_defaults.items():
-        if k == "theme": continue
-        if k not in config_loaded:
-            config_loaded[k] = v
-            should_update_file = True
+    # グローバル項目の補完 ("theme" は上で補完済みのものが優先される)
+    merged_config = _THEME_DEFAULTS | config_loaded
+    if len(merged_config) != len(config_loaded):
+        should_update_file = True
+        for k in merged_config.keys() - config_loaded.keys():
+            merged_config[k] = copy.deepcopy(merged_config[k])
+    config_loaded = merged_config
 
     # 新規項目があった場合、または移行が行われた場合は保存する
+    # 新規項目の補完や移行の書き戻しは起動処理を待たせないよう別スレッドで行う
     if should_update_file:
-        save_global_config(config_loaded)
+        threading.Thread(
+            target=_deferred_save_global_config,
+            args=(copy.deepcopy(config_loaded), _SAVE_GENERATION),
+            daemon=True,
+        ).start()
+
+    stat_key = _stat_key(config_path)
+    if stat_key is not None:
+        _CFG_CACHE = (stat_key, copy.deepcopy(config_loaded))
 
     return config_loaded
 
 
-def save_global_config(config: dict[str, Any]) -> bool:
-    """グローバル設定ファイルに保存する."""
+def _save_global_config_locked(config: dict[str, Any]) -> bool:
+    """グローバル設定ファイルに書き込む. _SAVE_LOCK を保持した状態で呼ぶこと。"""
+    global _CFG_CACHE
     config_path = get_config_path()
     try:
-        with open(config_path, "w", encoding="utf-8") as f:
-            json.dump(config, f, ensure_ascii=False, indent=2)
+        _write_bytes_if_changed(config_path, _json_dumps(config))
+        _CFG_CACHE = None
         return True
     except Exception as e:
         print(f"設定ファイルの保存に失敗しました: {e}")
         return False
 
 
+def _deferred_save_global_config(config: dict[str, Any], generation: int) -> None:
+    """読み込み時の補完結果を書き戻す. 以降に通常の保存があれば古い内容なので何もしない。"""
+    with _SAVE_LOCK:
+        if generation != _SAVE_GENERATION:
+            return
+        _save_global_config_locked(config)
+
+
+def save_global_config(config: dict[str, Any]) -> bool:
+    """グローバル設定ファイルに保存する."""
+    global _SAVE_GENERATION
+    with _SAVE_LOCK:
+        _SAVE_GENERATION += 1
+        return _save_global_config_locked(config)
+
+
+@functools.lru_cache(maxsize=256)
+def _settings_path(video_filepath: str) -> str:
+    """動画ファイルに対応する設定ファイル (.settings.json) のパスを返す."""
+    return os.path.splitext(video_filepath)[0] + '.settings.json'
+
+
 def load_video_settings(video_filepath: str) -> dict[str, Any] | None:
     """動画個別の設定ファイルを読み込む（動画ファイルと同階層）."""
     if not video_filepath:
         return None
-    settings_path = os.path.splitext(video_filepath)[0] + '.settings.json'
-    if os.path.exists(settings_path):
-        try:
-            with open(settings_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception:
-            pass
-    return None
+    settings_path = _settings_path(video_filepath)
+    stat_key = _stat_key(settings_path)
+    if stat_key is None:
+        _VIDEO_SETTINGS_CACHE.pop(settings_path, None)
+        return None
+    cached = _VIDEO_SETTINGS_CACHE.get(settings_path)
+    if cached is not None and cached[0] == stat_key:
+        return copy.deepcopy(cached[1])
+    try:
+        data = _load_json_file(settings_path)
+    except Exception:
+        return None
+    if isinstance(data, dict):
+        _VIDEO_SETTINGS_CACHE[settings_path] = (stat_key, copy.deepcopy(data))
+    return data
 
 
 def save_video_settings(
@@ -278,7 +453,7 @@ def save_video_settings(
     if not video_filepath:
         return None
     
-    save_path = os.path.splitext(video_filepath)[0] + '.settings.json'
+    save_path = _settings_path(video_filepath)
     data = {
         'video_file': video_filepath,
         'crop_rect': {
@@ -296,19 +471,30 @@ def save_video_settings(
         data.update(additional_data)
         
     try:
-        with open(save_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        _write_bytes_if_changed(save_path, _json_dumps(data))
+        _VIDEO_SETTINGS_CACHE.pop(save_path, None)
         return save_path
     except Exception:
         return None
 
 
+def _has_ratio_prefix(key: str) -> bool:
+    """キーの先頭に比率ラベル ("16:9 " など, 正規表現 ^\\d+:\\d+\\s 相当) があるか判定する."""
+    colon = key.find(':')
+    if colon <= 0 or not key[:colon].isdecimal():
+        return False
+    i = colon + 1
+    n = len(key)
+    while i < n and key[i].isdecimal():
+        i += 1
+    return colon + 1 < i < n and key[i].isspace()
+
+
 def normalize_presets(presets: dict[str, list[int]]) -> dict[str, list[int]]:
     """プリセットのキーに比率ラベルがなければ付与する."""
-    import re
     new_presets = {}
     for k, v in presets.items():
-        if re.match(r'^\d+:\d+\s', str(k)):
+        if _has_ratio_prefix(str(k)):
             new_presets[k] = v
         else:
             try:
@@ -327,15 +513,23 @@ def normalize_presets(presets: dict[str, list[int]]) -> dict[str, list[int]]:
     return new_presets
 
 
-def get_default_presets_with_labels() -> dict[str, list[int]]:
-    """比率ラベル付きのデフォルトプリセットを返す."""
+def _build_default_presets_with_labels() -> dict[str, list[int]]:
+    """デフォルトプリセットの名前に比率ラベルを付与した辞書を作る."""
     new_defaults = {}
-    for k, v in DEFAULT_PRESETS.items():
+    for name, w, h in _DEFAULT_PRESETS_RAW:
         try:
-            w, h = int(v[0]), int(v[1])
-            lbl = ratio_label_from_wh(w, h)
-            new_key = f"{lbl} {k}"
+            new_key = f"{ratio_label_from_wh(w, h)} {name}"
         except Exception:
-            new_key = k
-        new_defaults[new_key] = v
+            new_key = name
+        new_defaults[new_key] = [w, h]
     return new_defaults
+
+
+# DEFAULT_PRESETS は不変なのでラベル付け結果はインポート時に一度だけ作る
+_DEFAULT_PRESETS_LABELED = _build_default_presets_with_labels()
+
+
+def get_default_presets_with_labels() -> dict[str, list[int]]:
+    """比率ラベル付きのデフォルトプリセットを返す."""
+    # 呼び出し側で編集されても共有データが壊れないよう値のリストも複製する
+    return {k: list(v) for k, v in _DEFAULT_PRESETS_LABELED.items()}
@@ -9,6 +9,10 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     pass
 
+# Tk のウィジェット状態 (tk.NORMAL / tk.DISABLED と同じ文字列)
+_TK_NORMAL = "normal"
+_TK_DISABLED = "disabled"
+
 
 class CropHandlerMixin:
     """クロップ矩形操作のメソッドを提供するMixinクラス.
@@ -18,8 +22,8 @@ class CropHandlerMixin:
     
     # 以下の属性は VideoCropperApp から継承される想定
     # crop_rect: list[int]
-    # crop_history: list
-    # crop_redo: list
+    # crop_history: deque[tuple[int, int, int, int]]
+    # crop_redo: deque[tuple[int, int, int, int]]
     # MIN_W, MIN_H: int
     # CANVAS_W, CANVAS_H: int
     # canvas_scale_x, canvas_scale_y: float
@@ -30,10 +34,11 @@ class CropHandlerMixin:
     
     def push_crop_history(self) -> None:
         """現在のクロップ矩形を履歴に追加する."""
-        current = self.crop_rect.copy()
-        if self.crop_history and self.crop_history[-1] == current:
+        history = self.crop_history
+        current = tuple(self.crop_rect)
+        if history and history[-1] == current:
             return
-        self.crop_history.append(current)
+        history.append(current)
         # Redo スタックはクリア（新しい操作が入ったため）
         self.crop_redo.clear()
         self.update_undo_button_state()
@@ -43,8 +48,8 @@ class CropHandlerMixin:
         if not self.crop_history:
             return
         # 現在の状態を Redo スタックに保存
-        self.crop_redo.append(self.crop_rect.copy())
-        self.crop_rect = self.crop_history.pop()
+        self.crop_redo.append(tuple(self.crop_rect))
+        self.crop_rect = list(self.crop_history.pop())
         self._sync_crop_rect_ui()
         self.update_undo_button_state()
 
@@ -53,25 +58,31 @@ class CropHandlerMixin:
         if not self.crop_redo:
             return
         # 現在の状態を履歴に保存
-        self.crop_history.append(self.crop_rect.copy())
-        self.crop_rect = self.crop_redo.pop()
+        self.crop_history.append(tuple(self.crop_rect))
+        self.crop_rect = list(self.crop_redo.pop())
         self._sync_crop_rect_ui()
         self.update_undo_button_state()
 
     def update_undo_button_state(self) -> None:
         """Undo/Redoボタンの有効/無効を更新する."""
+        self._set_undo_redo_button_state(
+            _TK_NORMAL if self.crop_history else _TK_DISABLED,
+            _TK_NORMAL if self.crop_redo else _TK_DISABLED,
+        )
+
+    def _set_undo_redo_button_state(self, undo_state: str, redo_state: str) -> None:
+        """Undo/Redoボタンの状態を設定する.
+
+        ドラッグ中は履歴追加のたびに呼ばれるが状態はほぼ変わらないため、
+        前回設定した状態と同じなら Tk の config 呼び出しを省く。
+        """
         try:
-            import tkinter as tk
-            if hasattr(self, 'btn_undo'):
-                if self.crop_history:
-                    self.btn_undo.config(state=tk.NORMAL)
-                else:
-                    self.btn_undo.config(state=tk.DISABLED)
-            if hasattr(self, 'btn_redo'):
-                if self.crop_redo:
-                    self.btn_redo.config(state=tk.NORMAL)
-                else:
-                    self.btn_redo.config(state=tk.DISABLED)
+            if hasattr(self, 'btn_undo') and getattr(self, '_undo_btn_state', None) != undo_state:
+                self.btn_undo.config(state=undo_state)
+                self._undo_btn_state = undo_state
+            if hasattr(self, 'btn_redo') and getattr(self, '_redo_btn_state', None) != redo_state:
+                self.btn_redo.config(state=redo_state)
+                self._redo_btn_state = redo_state
         except Exception:
             pass
 
@@ -93,20 +104,13 @@ class CropHandlerMixin:
              # ここではシンプルに、width/height の最小値だけ保証して座標制限は事実上外す
              # (UI操作で戻ってこられる範囲ならOK)
              limit_margin = 5000 # 画面外許容範囲
-             if x1 < -limit_margin: x1 = -limit_margin
-             if y1 < -limit_margin: y1 = -limit_margin
-             if x1 > vw + limit_margin: x1 = vw + limit_margin
-             if y1 > vh + limit_margin: y1 = vh + limit_margin
-             # x2, y2 は w, h から再計算されるので x1, y1 だけ見ればよいが念のため
+             x1 = min(max(x1, -limit_margin), vw + limit_margin)
+             y1 = min(max(y1, -limit_margin), vh + limit_margin)
+             # x2, y2 は w, h から再計算されるので x1, y1 だけ見ればよい
         else:
-            if x1 < 0:
-                x1 = 0
-            if y1 < 0:
-                y1 = 0
-            if x1 + w > vw:
-                x1 = vw - w
-            if y1 + h > vh:
-                y1 = vh - h
+            # 左上を 0 以上にした上で右下がはみ出さないよう寄せる（元の if 連鎖と同じ順序）
+            x1 = min(max(x1, 0), vw - w)
+            y1 = min(max(y1, 0), vh - h)
                 
         return [int(x1), int(y1), int(x1 + w), int(y1 + h)]
 
@@ -123,17 +127,13 @@ class CropHandlerMixin:
 
         if allow_oversize:
              limit_margin = 5000 # 画面外許容範囲
-             if x1 < -limit_margin: x1 = -limit_margin
-             if y1 < -limit_margin: y1 = -limit_margin
              # x2 = x1 + w が vw + limit_margin を超えないようにする
-             if x1 + w > vw + limit_margin: x1 = (vw + limit_margin) - w
-             if y1 + h > vh + limit_margin: y1 = (vh + limit_margin) - h
+             x1 = min(max(x1, -limit_margin), (vw + limit_margin) - w)
+             y1 = min(max(y1, -limit_margin), (vh + limit_margin) - h)
         else:
             # キャンバス（動画）内に収める
-            if x1 < 0: x1 = 0
-            if y1 < 0: y1 = 0
-            if x1 + w > vw: x1 = vw - w
-            if y1 + h > vh: y1 = vh - h
+            x1 = min(max(x1, 0), vw - w)
+            y1 = min(max(y1, 0), vh - h)
             
         return [int(x1), int(y1), int(x1 + w), int(y1 + h)]
 
@@ -196,56 +196,71 @@ class CropHandlerMixin:
         
         edges = self.resize_edge or {}
         allow_oversize = getattr(self, 'allow_oversize_var', None) and self.allow_oversize_var.get()
+        min_w, min_h = self.MIN_W, self.MIN_H
 
         # 最小サイズを保証
-        if x2 - x1 < self.MIN_W:
+        if x2 - x1 < min_w:
             if edges.get("r", False):
-                x2 = x1 + self.MIN_W
+                x2 = x1 + min_w
             else:
-                x1 = x2 - self.MIN_W
-        if y2 - y1 < self.MIN_H:
+                x1 = x2 - min_w
+        if y2 - y1 < min_h:
             if edges.get("b", False):
-                y2 = y1 + self.MIN_H
+                y2 = y1 + min_h
             else:
-                y1 = y2 - self.MIN_H
+                y1 = y2 - min_h
 
         if not allow_oversize:
             # 動画解像度の範囲内に制約
             if x1 < 0:
                 x1 = 0
                 if edges.get("l", False):
-                    x2 = max(x2, self.MIN_W)
+                    x2 = max(x2, min_w)
             if x2 > vw:
                 x2 = vw
                 if edges.get("r", False):
-                    x1 = min(x1, vw - self.MIN_W)
+                    x1 = min(x1, vw - min_w)
             if y1 < 0:
                 y1 = 0
                 if edges.get("t", False):
-                    y2 = max(y2, self.MIN_H)
+                    y2 = max(y2, min_h)
             if y2 > vh:
                 y2 = vh
                 if edges.get("b", False):
-                    y1 = min(y1, vh - self.MIN_H)
+                    y1 = min(y1, vh - min_h)
 
         return [int(x1), int(y1), int(x2), int(y2)]
 
+    def _scaled_crop_rect(self) -> tuple[int, int, int, int]:
+        """クロップ矩形をキャンバス座標に変換して返す.
+
+        マウス移動のたびに inside_rect / near_edge から何度も呼ばれるため、
+        矩形・スケール・オフセットが前回と同じならキャッシュした結果を返す。
+        """
+        sx, sy = self.canvas_scale_x, self.canvas_scale_y
+        ox, oy = self.canvas_offset_x, self.canvas_offset_y
+        key = (*self.crop_rect, sx, sy, ox, oy)
+        cache = getattr(self, '_scaled_rect_cache', None)
+        if cache is not None and cache[0] == key:
+            return cache[1]
+        x1, y1, x2, y2 = key[:4]
+        scaled = (
+            int(x1 * sx) + ox,
+            int(y1 * sy) + oy,
+            int(x2 * sx) + ox,
+            int(y2 * sy) + oy,
+        )
+        self._scaled_rect_cache = (key, scaled)
+        return scaled
+
     def inside_rect(self, x: int, y: int) -> bool:
         """座標がクロップ矩形の内側にあるかを判定する."""
-        x1, y1, x2, y2 = self.crop_rect
-        scaled_x1 = int(x1 * self.canvas_scale_x) + self.canvas_offset_x
-        scaled_y1 = int(y1 * self.canvas_scale_y) + self.canvas_offset_y
-        scaled_x2 = int(x2 * self.canvas_scale_x) + self.canvas_offset_x
-        scaled_y2 = int(y2 * self.canvas_scale_y) + self.canvas_offset_y
+        scaled_x1, scaled_y1, scaled_x2, scaled_y2 = self._scaled_crop_rect()
         return scaled_x1 <= x <= scaled_x2 and scaled_y1 <= y <= scaled_y2
 
     def near_edge(self, x: int, y: int, m: int = 20) -> dict[str, bool]:
         """座標がクロップ矩形のエッジ近くにあるかを判定する."""
-        x1, y1, x2, y2 = self.crop_rect
-        scaled_x1 = int(x1 * self.canvas_scale_x) + self.canvas_offset_x
-        scaled_y1 = int(y1 * self.canvas_scale_y) + self.canvas_offset_y
-        scaled_x2 = int(x2 * self.canvas_scale_x) + self.canvas_offset_x
-        scaled_y2 = int(y2 * self.canvas_scale_y) + self.canvas_offset_y
+        scaled_x1, scaled_y1, scaled_x2, scaled_y2 = self._scaled_crop_rect()
         
         left = abs(x - scaled_x1) < m and (scaled_y1 - m) <= y <= (scaled_y2 + m)
         right = abs(x - scaled_x2) < m and (scaled_y1 - m) <= y <= (scaled_y2 + m)
@@ -267,10 +282,10 @@ class CropHandlerMixin:
     def move_crop_by(self, dx: int, dy: int) -> None:
         """クロップ矩形をdx,dyだけ移動する（ピクセル単位）."""
         x1, y1, x2, y2 = self.crop_rect
+        w = x2 - x1
+        h = y2 - y1
         new_x1 = x1 + dx
         new_y1 = y1 + dy
-        new_x2 = x2 + dx
-        new_y2 = y2 + dy
         
         # 範囲チェック
         vw = getattr(self, "vid_w", self.CANVAS_W)
@@ -278,18 +293,11 @@ class CropHandlerMixin:
         allow_oversize = getattr(self, 'allow_oversize_var', None) and self.allow_oversize_var.get()
         
         if not allow_oversize:
-            if new_x1 < 0:
-                new_x1 = 0
-                new_x2 = x2 - x1
-            if new_y1 < 0:
-                new_y1 = 0
-                new_y2 = y2 - y1
-            if new_x2 > vw:
-                new_x2 = vw
-                new_x1 = vw - (x2 - x1)
-            if new_y2 > vh:
-                new_y2 = vh
-                new_y1 = vh - (y2 - y1)
+            # サイズを保ったまま動画範囲内に寄せる
+            new_x1 = min(max(new_x1, 0), vw - w)
+            new_y1 = min(max(new_y1, 0), vh - h)
+        new_x2 = new_x1 + w
+        new_y2 = new_y1 + h
         
         self.crop_rect = [int(new_x1), int(new_y1), int(new_x2), int(new_y2)]
         self._sync_crop_rect_ui()
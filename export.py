@@ -12,12 +12,25 @@ import tkinter as tk
 import tkinter.ttk as ttk
 from tkinter import filedialog, messagebox
 from typing import TYPE_CHECKING
+import bisect
 import csv
+import hashlib
+import queue
+import shutil
+import threading
+from collections import deque
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
 
 import cv2
 import numpy as np
 from PIL import Image
 
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
 import overlay_utils
 from utils import imwrite_jp, sec_to_hhmmss, open_folder_with_selection
 
@@ -25,6 +38,118 @@ if TYPE_CHECKING:
     pass
 
 
+# H.264 エンコーダ候補の ffmpeg 引数 (ハードウェアエンコーダ優先、最後はソフトウェアの libx264)
+_H264_ENCODERS: tuple[tuple[str, ...], ...] = (
+    ("-c:v", "h264_nvenc", "-preset", "p4", "-cq", "23", "-pix_fmt", "yuv420p"),
+    ("-c:v", "h264_qsv", "-global_quality", "23", "-pix_fmt", "nv12"),
+    ("-c:v", "h264_amf", "-quality", "balanced", "-pix_fmt", "yuv420p"),
+    ("-c:v", "h264_videotoolbox", "-b:v", "8M", "-pix_fmt", "yuv420p"),
+    ("-c:v", "libx264", "-preset", "veryfast", "-crf", "20", "-pix_fmt", "yuv420p"),
+)
+
+# _pick_h264_encoder の結果のキャッシュ (空リストは ffmpeg が使えないことを表す)
+_h264_encoder_args: list[str] | None = None
+
+
+def _pick_h264_encoder() -> list[str]:
+    """この環境で使える H.264 エンコーダの ffmpeg 引数を返す. ffmpeg が無ければ空リスト。
+
+    一覧に載っていてもドライバやGPUが無いと動かないため、候補ごとに1フレームだけ
+    試しにエンコードして最初に成功したものを選ぶ。結果はプロセス中キャッシュする。
+    """
+    global _h264_encoder_args
+    if _h264_encoder_args is not None:
+        return _h264_encoder_args
+
+    result: list[str] = []
+    for args in _H264_ENCODERS:
+        cmd = [
+            'ffmpeg', '-hide_banner', '-loglevel', 'error',
+            '-f', 'lavfi', '-i', 'color=c=black:s=256x256:d=0.1',
+            '-frames:v', '1', *args, '-f', 'null', '-'
+        ]
+        try:
+            proc = subprocess.run(cmd, capture_output=True, timeout=15)
+        except FileNotFoundError:
+            # ffmpeg 自体が無い
+            break
+        except Exception:
+            continue
+        if proc.returncode == 0:
+            result = list(args)
+            break
+
+    _h264_encoder_args = result
+    return result
+
+
+def _reset_h264_encoder() -> None:
+    """_pick_h264_encoder のキャッシュを捨て、次回の書き出しで選び直させる.
+
+    試しのエンコードが通っても、セッション数の上限やドライバの不調で本番中に落ちることがあるため。
+    """
+    global _h264_encoder_args
+    _h264_encoder_args = None
+
+
+def _frame_digest(img: np.ndarray) -> bytes:
+    """フレームの内容から重複判定用の 64bit ハッシュを計算する.
+
+    フレームごとに一度だけ計算し、前後フレームや直前の出力との比較はハッシュ同士で行う。
+    xxhash が入っていれば blake2b より大幅に速い XXH3 を使う。
+    """
+    buf = np.ascontiguousarray(img)
+    if xxhash is not None:
+        return xxhash.xxh3_64_digest(buf)
+    return hashlib.blake2b(buf, digest_size=8).digest()
+
+
+def _prefetch_frames(cap: cv2.VideoCapture, count: int, prefetch: int = 8):
+    """cap から最大 count フレームを別スレッドで先読みしながら順に返すジェネレータ.
+
+    デコードをクロップ・オーバーレイ処理と並行させるための読み込み段。
+    キューの上限 (prefetch) で先読み量を抑え、メモリ使用量が増え続けないようにする。
+    読み込みに失敗した時点 (動画の末尾) で終了する。
+    """
+    frame_q: queue.Queue = queue.Queue(maxsize=prefetch)
+    stop = threading.Event()
+
+    def _put(item) -> None:
+        # 消費側が途中で止めた場合に put で固まらないよう、タイムアウト付きで待つ
+        while not stop.is_set():
+            try:
+                frame_q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _reader() -> None:
+        try:
+            for _ in range(count):
+                if stop.is_set():
+                    return
+                ret, frm = cap.read()
+                if not ret or frm is None:
+                    break
+                _put(frm)
+        except Exception as e:
+            print(f"Frame read error: {e}")
+        finally:
+            _put(None)
+
+    reader = threading.Thread(target=_reader, daemon=True)
+    reader.start()
+    try:
+        while True:
+            frm = frame_q.get()
+            if frm is None:
+                return
+            yield frm
+    finally:
+        stop.set()
+        reader.join()
+
+
 def open_folder(path: str) -> None:
     """プラットフォーム依存でフォルダを開く."""
     try:
@@ -63,6 +188,7 @@ class ExportMixin:
     # video_filepath: str
     # video_filename: str
     # crop_rect: list[int]
+    # vid_w, vid_h: int
     # start_time, end_time: float
     # fps: float
     # playing: bool
@@ -88,6 +214,137 @@ class ExportMixin:
             return
         open_file(settings_path)
 
+    def _export_video_size(self) -> tuple[int, int]:
+        """動画の幅・高さを返す（読み込み時の値を優先し、無ければcapから取得して保持）."""
+        vid_w = getattr(self, "vid_w", None)
+        vid_h = getattr(self, "vid_h", None)
+        if not vid_w or not vid_h:
+            vid_w = self.vid_w = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            vid_h = self.vid_h = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        return vid_w, vid_h
+
+    def _png_save_params(self) -> list[int]:
+        """PNG連番出力で imwrite に渡すパラメータを返す."""
+        return [int(cv2.IMWRITE_PNG_COMPRESSION), max(0, min(9, int(self.png_compression)))]
+
+    def _png_sequence_path(self, save_dir: str, t: float) -> str:
+        """PNG連番の出力ファイルパスを返す (動画名_時刻_秒内フレーム番号.png)."""
+        time_str = sec_to_hhmmss(t)
+        frame_in_sec = int((t - int(t)) * self.fps)
+        return os.path.join(save_dir, f"{self.video_filename}_{time_str}_{frame_in_sec:03d}.png")
+
+    def _export_png_with_ffmpeg(self, save_dir: str, rect: tuple[int, int, int, int], total_steps: int,
+                                use_duplicate: bool, on_progress) -> int | None:
+        """デコード・クロップ・重複除外・PNG化を ffmpeg 1回で行い、保存枚数を返す.
+
+        オーバーレイも前後一致判定も不要な場合の高速経路。ffmpeg が無い・失敗した場合は
+        None を返すので、呼び出し側で通常の (1フレームずつ処理する) 経路にフォールバックする。
+        """
+        if shutil.which('ffmpeg') is None:
+            return None
+
+        vx1, vy1, vx2, vy2 = rect
+        vw = vx2 - vx1
+        vh = vy2 - vy1
+        fps = self.fps
+        start_time = self.start_time
+
+        # 通常経路と同じく開始位置から total_steps フレームだけを処理する (時間ではなくフレーム数で区切る)。
+        # showinfo@in で読み込んだ順番 (通常経路の step_idx) と pts の対応を受け取る。
+        # 色差の間引きで1px ずれないよう RGB (planar) に変換してからクロップする
+        filters = [
+            f"trim=end_frame={total_steps}", "showinfo@in",
+            "format=gbrp", f"crop={vw}:{vh}:{vx1}:{vy1}",
+        ]
+        if use_duplicate:
+            # 直前に出力したフレームと1画素でも違えば残す (閾値0の mpdecimate)。
+            # mpdecimate は左端8px と 4px 単位に満たない右端・下端を比較しないため、
+            # 黒で余白を付けて全画素が比較範囲に入るようにし、判定後に元のサイズへ戻す
+            pad_w = 16 + (vw + 3) // 4 * 4
+            pad_h = (max(vh, 8) + 3) // 4 * 4
+            filters += [
+                f"pad={pad_w}:{pad_h}:8:0",
+                "mpdecimate=hi=0:lo=0:frac=0",
+                f"crop={vw}:{vh}:8:0",
+            ]
+        # 出力された各フレームの pts を showinfo@out で受け取り、読み込み順の番号に戻してファイル名に使う
+        filters.append("showinfo@out")
+
+        # image2 の連番パターンとして解釈されないよう、保存先の % はエスケープする
+        tmp_pattern = os.path.join(save_dir.replace('%', '%%'), "_ffmpeg_%06d.png")
+        cmd = [
+            'ffmpeg', '-y', '-hide_banner', '-nostats',
+            '-ss', str(start_time),
+            '-i', self.video_filepath,
+            '-vf', ",".join(filters), '-vsync', '0',
+            '-pix_fmt', 'rgb24', '-compression_level', str(self._png_save_params()[1]),
+            tmp_pattern
+        ]
+        try:
+            proc = subprocess.Popen(
+                cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                text=True, encoding='utf-8', errors='replace'
+            )
+        except OSError as e:
+            print(f"ffmpeg PNG export error: {e}")
+            return None
+
+        # pts -> 読み込み順の番号。時刻から番号を逆算すると可変フレームレートで重複・飛び越しが起きるため、
+        # 読み込み側の showinfo の通し番号をそのまま使う
+        step_of_pts: dict[int, int] = {}
+        frame_indices: list[int] = []
+        mapping_ok = True
+        for line in proc.stderr:
+            if line.startswith('[showinfo@in '):
+                is_input = True
+            elif line.startswith('[showinfo@out '):
+                is_input = False
+            else:
+                continue
+            pos = line.find(' pts:')
+            if pos < 0:
+                continue
+            try:
+                pts = int(line[pos + 5:].split(None, 1)[0])
+            except (ValueError, IndexError):
+                continue
+            if is_input:
+                if pts in step_of_pts:
+                    # pts が重複する入力は対応付けられない
+                    mapping_ok = False
+                step_idx = len(step_of_pts)
+                step_of_pts[pts] = step_idx
+                on_progress(min(total_steps, step_idx + 1))
+            else:
+                step_idx = step_of_pts.get(pts)
+                if step_idx is None or (frame_indices and step_idx <= frame_indices[-1]):
+                    mapping_ok = False
+                    step_idx = -1
+                frame_indices.append(step_idx)
+
+        tmp_files = [os.path.join(save_dir, f"_ffmpeg_{k + 1:06d}.png") for k in range(len(frame_indices))]
+
+        if proc.wait() != 0 or not mapping_ok:
+            # 途中まで書かれた一時ファイルを消して通常経路に任せる
+            # (出力フレームを読み込み順の番号に対応付けられなかった場合も同様)
+            for path in tmp_files:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            return None
+
+        placed: set[str] = set()
+        for path, step_idx in zip(tmp_files, frame_indices):
+            if not os.path.exists(path):
+                continue
+            dest = self._png_sequence_path(save_dir, start_time + step_idx / fps)
+            # 秒内フレーム番号の切り捨てで同じ名前になる場合は通常経路と同じく後のフレームで上書きし、
+            # 保存枚数は実際に残ったファイルだけを数える
+            os.replace(path, dest)
+            placed.add(dest)
+        return len(placed)
+
     def export_png(self) -> None:
         """クロップ範囲をPNG連番として出力する."""
         if not self.cap:
@@ -104,14 +361,12 @@ class ExportMixin:
         save_dir = os.path.join(base_dir, f"{video_name}_crops_{now}")
         os.makedirs(save_dir, exist_ok=True)
 
-        # PNG圧縮レベルを設定
-        save_params = [int(cv2.IMWRITE_PNG_COMPRESSION), self.png_compression]
+        # PNG圧縮レベルを設定 (ループ中は同じリストを使い回す)
+        save_params = self._png_save_params()
 
         # 座標変換
-        x1, y1, x2, y2 = self.crop_rect
-        vid_w = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        vid_h = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        vx1, vy1, vx2, vy2 = [int(v) for v in self.crop_rect]
+        vid_w, vid_h = self._export_video_size()
+        vx1, vy1, vx2, vy2 = map(int, self.crop_rect)
         
         # 枠外選択が許可されていない場合は安全のためクランプ
         if not (getattr(self, 'allow_oversize_var', None) and self.allow_oversize_var.get()):
@@ -160,148 +415,226 @@ class ExportMixin:
             pb = None
             prog_label = None
 
+        limit = self.end_time
+        
+        # estimate total steps for progressbar
         try:
-            count = 0
-            t = self.start_time
-            limit = self.end_time
-            frame_interval = 1.0 / self.fps
-            
-            # estimate total steps for progressbar
+            total_steps = max(0, int((limit - self.start_time) * self.fps) + 1)
+        except Exception:
+            total_steps = 0
+        if pb is not None and total_steps > 0:
+            pb['maximum'] = total_steps
             try:
-                total_steps = max(0, int((limit - t) / frame_interval) + 1)
+                prog_label.config(text=f"0 / {total_steps}")
             except Exception:
-                total_steps = 0
-            if pb is not None and total_steps > 0:
-                pb['maximum'] = total_steps
-                try:
-                    prog_label.config(text=f"0 / {total_steps}")
-                except Exception:
-                    pass
-            
-            prev_crop = None
-            next_crop = None
-            last_saved_img = None
+                pass
 
-            # Overlay用
-            history_manager = overlay_utils.InputHistoryManager()
-            last_search_idx = 0
-            
-            from utils import get_safe_crop
+        # Tk 変数はワーカースレッドから触らないよう開始前に読んでおく
+        use_prev_next = self.check_prev_next.get()
+        use_duplicate = self.check_duplicate.get()
+
+        # オーバーレイを描かず前後一致判定も不要なら、ffmpeg だけで書き出す高速経路を使う
+        # (枠外を含むクロップは黒埋めが必要なので通常経路で処理する)
+        # 書き出し中は設定を変更できない (grab_set) ため、表示設定もここで確定させる
+        overlay_flags = self._overlay_flags()
+        has_overlay = bool(getattr(self, 'trajectory_data', None)) and any(overlay_flags)
+        use_ffmpeg_path = (
+            bool(self.video_filepath) and total_steps > 0 and not use_prev_next and not has_overlay
+            and 0 <= vx1 < vx2 <= vid_w and 0 <= vy1 < vy2 <= vid_h
+        )
 
-            step_idx = 0
-            while t <= limit:
-                self.cap.set(cv2.CAP_PROP_POS_MSEC, t * 1000)
-                ret, frm = self.cap.read()
-                if ret and frm is not None:
-                    # get_safe_crop を使用してクロップ (枠外は黒)
-                    crop = get_safe_crop(frm, (vx1, vy1, vx2, vy2), (0, 0, 0))
-                    
-                    if crop.size > 0:
-                        # 次のフレームを取得
-                        next_t = t + frame_interval
-                        if next_t <= limit:
-                            self.cap.set(cv2.CAP_PROP_POS_MSEC, next_t * 1000)
-                            ret_next, frm_next = self.cap.read()
-                            if ret_next and frm_next is not None:
-                                next_crop = get_safe_crop(frm_next, (vx1, vy1, vx2, vy2), (0, 0, 0))
-                            else:
-                                next_crop = None
-                        else:
-                            next_crop = None
-
-                        # 前のフレーム、現在のフレーム、次のフレームが全て同じかチェック
-                        is_matches_prev_next = False
-                        if self.check_prev_next.get():
-                            if prev_crop is not None and next_crop is not None:
-                                diff1 = cv2.cvtColor(cv2.absdiff(prev_crop, crop), cv2.COLOR_BGR2GRAY)
-                                diff2 = cv2.cvtColor(cv2.absdiff(crop, next_crop), cv2.COLOR_BGR2GRAY)
-                                if cv2.countNonZero(diff1) == 0 and cv2.countNonZero(diff2) == 0:
-                                    is_matches_prev_next = True
-                            elif prev_crop is None and next_crop is not None:
-                                diff2 = cv2.cvtColor(cv2.absdiff(crop, next_crop), cv2.COLOR_BGR2GRAY)
-                                if cv2.countNonZero(diff2) == 0:
-                                    is_matches_prev_next = True
-                            elif prev_crop is not None and next_crop is None:
-                                diff1 = cv2.cvtColor(cv2.absdiff(prev_crop, crop), cv2.COLOR_BGR2GRAY)
-                                if cv2.countNonZero(diff1) == 0:
-                                    is_matches_prev_next = True
-                        else:
-                            is_matches_prev_next = True
-
-                        # オーバーレイ適用 (判定用に作成)
-                        crop_overlay = crop.copy() # デフォルトはそのまま
-                        if is_matches_prev_next:
-                             rgb = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
-                             pil = Image.fromarray(rgb)
-                             last_search_idx = self._draw_overlay_on_image(pil, t, history_manager, last_search_idx, vx1, vy1)
-                             crop_overlay = cv2.cvtColor(np.array(pil), cv2.COLOR_RGB2BGR)
-
-                        # 直前に出力したフレームとも比較 (比較はオーバーレイ無しの raw frame で行う)
-                        is_same_as_last_saved = False
-                        if self.check_duplicate.get() and last_saved_img is not None:
-                            # 以前は last_saved_img (overlayあり) と crop_overlay を比較していたが、
-                            # マウスが動くだけで不一致扱いになるのを防ぐため、生データ(crop)と比較する
-                            # last_saved_img には生の crop を保存しておく必要がある
-                            diff_last = cv2.cvtColor(cv2.absdiff(last_saved_img, crop), cv2.COLOR_BGR2GRAY)
-                            if cv2.countNonZero(diff_last) == 0:
-                                is_same_as_last_saved = True
-
-                        # チェックボックスの設定に応じて出力判定
-                        if is_matches_prev_next and not is_same_as_last_saved:
-                            time_str = sec_to_hhmmss(t)
-                            frame_in_sec = int((t - int(t)) * self.fps)
-                            filepath = os.path.join(save_dir, f"{self.video_filename}_{time_str}_{frame_in_sec:03d}.png")
-                            imwrite_jp(filepath, crop_overlay, params=save_params)
-                            
-                            # 重複判定用に生の crop を保存
-                            last_saved_img = crop.copy()
-                            count += 1
+        # プログレスバーの更新は最大でも 200 回程度に間引く
+        progress_every = max(1, total_steps // 200)
 
-                        prev_crop = crop.copy()
-                t += frame_interval
-                
-                # update progress
-                step_idx += 1
-                if pb is not None:
-                    try:
-                        pb['value'] = step_idx
-                        prog_label.config(text=f"{step_idx} / {total_steps}")
-                        progress_win.update()
-                    except Exception:
-                        pass
+        from utils import get_safe_crop
 
-            # 設定を保存
+        def _update_progress(v):
             try:
-                self.save_config()
+                pb['value'] = v
+                prog_label.config(text=f"{v} / {total_steps}")
             except Exception:
                 pass
 
-            # 完了ダイアログの前にウィンドウを消す
+        def _close_progress():
             try:
                 if progress_win is not None:
                     progress_win.grab_release()
                     progress_win.destroy()
-                    progress_win = None
             except Exception:
                 pass
 
-            # 完了ダイアログとフォルダを開くかの確認
-            open_now = messagebox.askyesno("完了", f"{count} images saved.\nフォルダを開きますか？")
-            if open_now:
-                # フォルダを選択状態で開く
-                open_folder_with_selection(save_dir)
-        finally:
-            # Destroy progress dialog
-            try:
-                if progress_win is not None:
-                    progress_win.grab_release()
-                    progress_win.destroy()
-            except Exception:
-                pass
+        def _resume_playback():
             self.playing = was_playing
             if self.playing:
                 self.play_step()
 
+        def _run_export_png():
+            count = 0
+            submitted = 0
+            start_time = self.start_time
+            fps = self.fps
+            t = start_time
+            try:
+                # 高速経路 (ffmpeg) で書き出せた場合は保存枚数が返る。使えなければ1フレームずつ処理する
+                ffmpeg_count = None
+                if use_ffmpeg_path:
+                    last_reported = [0]
+
+                    def _on_ffmpeg_progress(v):
+                        # 重複除外でフレーム番号が飛ぶため、前回通知からの差で間引く
+                        if pb is not None and (v - last_reported[0] >= progress_every or v >= total_steps):
+                            last_reported[0] = v
+                            self.root.after(0, lambda: _update_progress(v))
+                    ffmpeg_count = self._export_png_with_ffmpeg(
+                        save_dir, (vx1, vy1, vx2, vy2), total_steps, use_duplicate, _on_ffmpeg_progress
+                    )
+
+                if ffmpeg_count is not None:
+                    count = submitted = ffmpeg_count
+                else:
+                    # 重複判定はフレームそのものではなくハッシュを保持して比較する
+                    prev_hash = None
+                    last_saved_hash = None
+
+                    # Overlay用
+                    history_manager = overlay_utils.InputHistoryManager()
+                    last_search_idx = 0
+            
+
+                    # シークは開始位置への1回だけにし、以降は順次読み込みで進める
+                    # (毎フレーム CAP_PROP_POS_MSEC を設定するとデコーダが再初期化され非常に遅い)
+                    # デコードは読み込みスレッドで先読みし、このスレッドはクロップ・判定に専念する
+                    self.cap.set(cv2.CAP_PROP_POS_MSEC, t * 1000)
+                    frames = _prefetch_frames(self.cap, total_steps)
+
+                    roi = (vx1, vy1, vx2, vy2)
+                    bg_color = (0, 0, 0)
+
+                    def _read_crop():
+                        # 次のフレームを順に受け取り、get_safe_crop でクロップする (枠外は黒)
+                        frm = next(frames, None)
+                        if frm is not None:
+                            return get_safe_crop(frm, roi, bg_color)
+                        return None
+
+                    # PNG エンコード (zlib 圧縮) は GIL を解放するのでスレッドプールで並列化する。
+                    # 未完了のタスク数に上限を設けてメモリ使用量を抑える
+                    png_workers = max(2, (os.cpu_count() or 2) - 1)
+                    max_pending = png_workers * 2
+                    pending = deque()
+
+                    step_idx = 0
+                    with closing(frames), ThreadPoolExecutor(max_workers=png_workers) as executor:
+                        crop = _read_crop()
+                        crop_hash = _frame_digest(crop) if crop is not None else None
+
+                        while t <= limit:
+                            # 次のフレームを先読み (次のループではこれが現在のフレームになる)
+                            # t は累積加算せず開始時刻とフレーム番号から求め、長尺でも誤差を溜めない
+                            next_t = start_time + (step_idx + 1) / fps
+                            next_crop = _read_crop() if next_t <= limit else None
+                            next_hash = _frame_digest(next_crop) if next_crop is not None else None
+
+                            if crop is not None:
+                                if crop.size > 0:
+                                    # 前のフレーム、現在のフレーム、次のフレームが全て同じかチェック
+                                    is_matches_prev_next = False
+                                    if use_prev_next:
+                                        if prev_hash is not None and next_hash is not None:
+                                            if prev_hash == crop_hash and crop_hash == next_hash:
+                                                is_matches_prev_next = True
+                                        elif prev_hash is None and next_hash is not None:
+                                            if crop_hash == next_hash:
+                                                is_matches_prev_next = True
+                                        elif prev_hash is not None and next_hash is None:
+                                            if prev_hash == crop_hash:
+                                                is_matches_prev_next = True
+                                    else:
+                                        is_matches_prev_next = True
+
+                                    # オーバーレイ適用 (判定用に作成)
+                                    # crop はフレームごとに新しく作られ以後書き換えないため、複製せずそのまま使う
+                                    crop_overlay = crop # デフォルトはそのまま
+                                    if is_matches_prev_next:
+                                         rgb = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
+                                         pil = Image.fromarray(rgb)
+                                         last_search_idx = self._draw_overlay_on_image(pil, t, history_manager, last_search_idx, vx1, vy1, overlay_flags)
+                                         crop_overlay = cv2.cvtColor(np.asarray(pil), cv2.COLOR_RGB2BGR)
+
+                                    # 直前に出力したフレームとも比較 (比較はオーバーレイ無しの raw frame で行う)
+                                    is_same_as_last_saved = False
+                                    if use_duplicate and last_saved_hash is not None:
+                                        # 以前は last_saved_img (overlayあり) と crop_overlay を比較していたが、
+                                        # マウスが動くだけで不一致扱いになるのを防ぐため、生データ(crop)と比較する
+                                        # last_saved_hash には生の crop のハッシュを保存しておく
+                                        if last_saved_hash == crop_hash:
+                                            is_same_as_last_saved = True
+
+                                    # チェックボックスの設定に応じて出力判定
+                                    if is_matches_prev_next and not is_same_as_last_saved:
+                                        filepath = self._png_sequence_path(save_dir, t)
+                                        # PNG エンコードは別スレッドに任せ、デコードと並行させる
+                                        # 保存枚数は書き出しが成功したものだけを数える (imwrite_jp は失敗時 False)
+                                        pending.append(executor.submit(imwrite_jp, filepath, crop_overlay, save_params))
+                                        if len(pending) >= max_pending:
+                                            count += pending.popleft().result()
+                            
+                                        # 重複判定用に生の crop のハッシュを保存
+                                        last_saved_hash = crop_hash
+                                        submitted += 1
+
+                                    prev_hash = crop_hash
+                            crop = next_crop
+                            crop_hash = next_hash
+                            t = next_t
+                
+                            # プログレス更新は間引いてメインスレッドに依頼する
+                            step_idx += 1
+                            if pb is not None and (step_idx % progress_every == 0 or step_idx >= total_steps):
+                                self.root.after(0, lambda v=step_idx: _update_progress(v))
+
+                        # 残りの書き出しがすべて終わるのを待ってから完了通知する
+                        while pending:
+                            count += pending.popleft().result()
+
+                def _finish():
+                    # 設定を保存
+                    try:
+                        self.save_config()
+                    except Exception:
+                        pass
+
+                    # 完了ダイアログの前にウィンドウを消す
+                    _close_progress()
+
+                    # 完了ダイアログとフォルダを開くかの確認
+                    msg = f"{count} images saved."
+                    if count < submitted:
+                        msg += f"\n{submitted - count} images failed to save."
+                    open_now = messagebox.askyesno("完了", f"{msg}\nフォルダを開きますか？")
+                    if open_now:
+                        # フォルダを選択状態で開く
+                        open_folder_with_selection(save_dir)
+                    _resume_playback()
+
+                self.root.after(0, _finish)
+
+            except Exception as e:
+                # e は except ブロックを抜けると消えるため、メッセージはここで確定させる
+                msg = str(e)
+
+                def _err(msg=msg):
+                    try:
+                        _close_progress()
+                        messagebox.showerror("Error", f"PNG出力中にエラーが発生しました:\n{msg}")
+                    finally:
+                        # ダイアログの表示に失敗しても再生状態は必ず元に戻す
+                        _resume_playback()
+                self.root.after(0, _err)
+
+        # デコードと PNG 書き出しはワーカースレッドで行い、UI を固めない
+        threading.Thread(target=_run_export_png, daemon=True).start()
+
     def export_gif(self) -> None:
         """クロップ範囲をGIFとして出力する(ffmpeg使用)."""
         if not self.cap or not self.video_filepath:
@@ -323,10 +656,8 @@ class ExportMixin:
             return
 
         # 座標変換
-        x1, y1, x2, y2 = self.crop_rect
-        vid_w = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        vid_h = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        vx1, vy1, vx2, vy2 = [int(v) for v in self.crop_rect]
+        vid_w, vid_h = self._export_video_size()
+        vx1, vy1, vx2, vy2 = map(int, self.crop_rect)
         
         # 安全のためクランプ
         vx1 = max(0, min(vid_w, vx1))
@@ -354,9 +685,6 @@ class ExportMixin:
         def _run():
             try:
                 # 高品質GIF生成のためのコマンド (パレット生成 -> パレット使用)
-                # パレット生成パス
-                palette_path = os.path.join(os.path.dirname(save_path), ".palette.png")
-
                 # クロップ設定
                 # 枠外選択がある場合、padフィルターを挟む必要がある
                 allow_oversize = getattr(self, 'allow_oversize_var', None) and self.allow_oversize_var.get()
@@ -391,28 +719,17 @@ class ExportMixin:
                 ss = self.start_time
                 t_dur = self.end_time - self.start_time
                 
-                # 1. パレット作成
-                cmd_palette = [
-                    'ffmpeg', '-y', '-ss', str(ss), '-t', str(t_dur),
-                    '-i', self.video_filepath,
-                    '-vf', f"{crop_filter_chain},palettegen",
-                    palette_path
-                ]
-                subprocess.run(cmd_palette, capture_output=True, check=True)
-
-                # 2. GIF生成
+                # パレット作成とパレット適用を1回の ffmpeg 実行で行う
+                # (split で分岐させ、入力のシーク・デコードを1回で済ませる。一時パレットファイルも不要)
                 cmd_gif = [
                     'ffmpeg', '-y', '-ss', str(ss), '-t', str(t_dur),
                     '-i', self.video_filepath,
-                    '-i', palette_path,
-                    '-filter_complex', f"[0:v]{crop_filter_chain}[v];[v][1:v]paletteuse",
+                    '-filter_complex',
+                    f"[0:v]{crop_filter_chain},split[a][b];[a]palettegen[p];[b][p]paletteuse",
                     save_path
                 ]
                 subprocess.run(cmd_gif, capture_output=True, check=True)
 
-                if os.path.exists(palette_path):
-                    os.remove(palette_path)
-
                 def _done():
                     progress_win.destroy()
                     if messagebox.askyesno("完了", "GIF保存が完了しました。フォルダを開きますか？"):
@@ -426,7 +743,6 @@ class ExportMixin:
                     messagebox.showerror("Error", f"GIFの生成に失敗しました:\n{e}")
                 self.root.after(0, _error)
 
-        import threading
         threading.Thread(target=_run, daemon=True).start()
 
     def export_video(self) -> None:
@@ -454,10 +770,8 @@ class ExportMixin:
         save_dir = os.path.dirname(save_path)
 
         # 座標変換
-        x1, y1, x2, y2 = self.crop_rect
-        vid_w = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        vid_h = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        vx1, vy1, vx2, vy2 = [int(v) for v in self.crop_rect]
+        vid_w, vid_h = self._export_video_size()
+        vx1, vy1, vx2, vy2 = map(int, self.crop_rect)
 
         # 枠外選択が許可されていない場合は安全のためクランプ
         if not (getattr(self, 'allow_oversize_var', None) and self.allow_oversize_var.get()):
@@ -492,22 +806,69 @@ class ExportMixin:
         prog_label = tk.Label(progress_win, text="0 / 0")
         prog_label.pack(padx=20, pady=(0, 15))
 
+        # 書き出し中は設定を変更できない (grab_set) ため、Tk 変数は開始前に読んでおく
+        # (ワーカースレッドから毎フレーム Tcl を呼ばない)
+        embed_overlay = bool(getattr(self, 'embed_overlay_var', None) and self.embed_overlay_var.get())
+        overlay_flags = self._overlay_flags()
+
         def _run_export():
+            proc = None
             try:
-                # VideoWriter の設定
-                fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-                out = cv2.VideoWriter(save_path, fourcc, self.fps, (crop_w, crop_h))
+                encoder_args = _pick_h264_encoder()
+                if encoder_args:
+                    # ffmpeg に生フレームをパイプで渡して H.264 (可能ならハードウェア) でエンコードする
+                    # yuv420p / nv12 は幅・高さが偶数である必要があるため、奇数なら右下を1px黒で埋める
+                    out_w = crop_w + (crop_w % 2)
+                    out_h = crop_h + (crop_h % 2)
+                    cmd = [
+                        'ffmpeg', '-y', '-hide_banner', '-loglevel', 'error',
+                        '-f', 'rawvideo', '-pix_fmt', 'bgr24',
+                        '-s', f"{crop_w}x{crop_h}", '-r', str(self.fps),
+                        '-i', '-'
+                    ]
+                    if (out_w, out_h) != (crop_w, crop_h):
+                        cmd += ['-vf', f"pad={out_w}:{out_h}:0:0:black"]
+                    cmd += [*encoder_args, '-movflags', '+faststart', save_path]
+                    proc = subprocess.Popen(
+                        cmd, stdin=subprocess.PIPE,
+                        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+                    )
+                    ffmpeg_proc = proc
+
+                    def _ffmpeg_failure() -> RuntimeError:
+                        # エンコーダが途中で終了した場合は ffmpeg 自身のエラー出力を添えて報告する
+                        try:
+                            ffmpeg_proc.stdin.close()
+                        except OSError:
+                            pass
+                        err = ffmpeg_proc.stderr.read()
+                        ffmpeg_proc.wait()
+                        _reset_h264_encoder()
+                        return RuntimeError(f"ffmpeg でのエンコードに失敗しました: {err.decode('utf-8', 'replace').strip()}")
+
+                    def write_frame(buf):
+                        try:
+                            ffmpeg_proc.stdin.write(buf)
+                        except OSError:
+                            # BrokenPipeError を含む (エンコーダが先に終了している)
+                            raise _ffmpeg_failure() from None
+                else:
+                    # ffmpeg が使えない環境では従来どおり OpenCV の VideoWriter (mp4v) で書き出す
+                    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+                    out = cv2.VideoWriter(save_path, fourcc, self.fps, (crop_w, crop_h))
 
-                if not out.isOpened():
-                    self.root.after(0, lambda: messagebox.showerror("Error", "動画ファイルを作成できませんでした"))
-                    self.root.after(0, progress_win.destroy)
-                    return
+                    if not out.isOpened():
+                        self.root.after(0, lambda: messagebox.showerror("Error", "動画ファイルを作成できませんでした"))
+                        self.root.after(0, progress_win.destroy)
+                        return
+                    write_frame = out.write
 
                 # start_time から end_time までのフレームを処理
-                t = self.start_time
+                start_time = self.start_time
+                fps = self.fps
+                t = start_time
                 limit = self.end_time
-                frame_interval = 1.0 / self.fps
-                total_frames = int((limit - t) / frame_interval) + 1
+                total_frames = int((limit - t) * fps) + 1
                 
                 self.root.after(0, lambda: pb.config(maximum=total_frames))
                 
@@ -518,34 +879,79 @@ class ExportMixin:
                 last_search_idx = 0
                 
                 from utils import get_safe_crop
+                roi = (vx1, vy1, vx2, vy2)
+                bg_color = (0, 0, 0)
 
-                while t <= limit:
-                    self.cap.set(cv2.CAP_PROP_POS_MSEC, t * 1000)
-                    ret, frm = self.cap.read()
-                    if ret and frm is not None:
+                # シークは開始位置への1回だけにし、以降は順次読み込みで進める
+                self.cap.set(cv2.CAP_PROP_POS_MSEC, t * 1000)
+
+                # デコード (読み込みスレッド) | クロップ・オーバーレイ (このスレッド) | エンコーダへの書き込み
+                # (書き込みスレッド) の3段で並行させる。書き込みはフレーム順を保つため1スレッドにし、
+                # 未完了の書き込み数に上限を設けてメモリ使用量を抑える
+                pending = deque()
+                max_pending = 8
+
+                def _update_progress(v, c):
+                    try:
+                        pb['value'] = v
+                        prog_label.config(text=f"{c} / {total_frames}")
+                    except Exception:
+                        pass
+
+                ui_interval = 1 / 60
+                last_ui = 0.0
+
+                # 終了判定は浮動小数の時刻比較ではなくフレーム数で行う
+                # (読めなくなったら動画の末尾なので _prefetch_frames 側で打ち切られる)
+                with closing(_prefetch_frames(self.cap, total_frames)) as frames, \
+                     ThreadPoolExecutor(max_workers=1) as writer:
+                    for frame_idx, frm in enumerate(frames):
+                        # t は累積加算せず開始時刻とフレーム番号から求め、長尺でも誤差を溜めない
+                        t = start_time + frame_idx / fps
                         # get_safe_crop を使用してクロップ
-                        crop = get_safe_crop(frm, (vx1, vy1, vx2, vy2), (0, 0, 0))
-                        
+                        crop = get_safe_crop(frm, roi, bg_color)
+
                         if crop.size > 0:
                             # Overlay適用 (埋め込みチェックボックスがONの場合のみ)
-                            if getattr(self, 'embed_overlay_var', None) and self.embed_overlay_var.get():
+                            if embed_overlay:
                                 rgb = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
                                 pil = Image.fromarray(rgb)
-                                last_search_idx = self._draw_overlay_on_image(pil, t, history_manager, last_search_idx, vx1, vy1)
+                                last_search_idx = self._draw_overlay_on_image(pil, t, history_manager, last_search_idx, vx1, vy1, overlay_flags)
                                 crop = cv2.cvtColor(np.array(pil), cv2.COLOR_RGB2BGR)
 
-                            # サイズが合わない場合はリサイズ (端数の関係でズレることがある)
-                            if crop.shape[1] != crop_w or crop.shape[0] != crop_h:
-                                crop = cv2.resize(crop, (crop_w, crop_h))
-                            out.write(crop)
+                            # get_safe_crop は常に (crop_h, crop_w) の連続配列を返すためリサイズは不要。
+                            # ffmpeg へはコピーせずバッファのまま渡す
+                            pending.append(writer.submit(write_frame, crop))
+                            if len(pending) >= max_pending:
+                                pending.popleft().result()
                             frame_count += 1
-                    t += frame_interval
-                    
-                    # プログレス更新
-                    curr_c = frame_count
-                    self.root.after(0, lambda c=curr_c: pb.step(1) or prog_label.config(text=f"{c} / {total_frames}"))
 
-                out.release()
+                        # プログレス更新は最大でも約60回/秒に間引いてメインスレッドに依頼する
+                        now = time.monotonic()
+                        if now - last_ui >= ui_interval:
+                            last_ui = now
+                            self.root.after(0, lambda v=frame_idx + 1, c=frame_count: _update_progress(v, c))
+
+                    # 残りの書き込みが終わるのを待つ (例外があればここで送出される)
+                    while pending:
+                        pending.popleft().result()
+
+                # 間引きで最後の状態が反映されていない場合に備えて最終値を送る
+                self.root.after(0, lambda c=frame_count: _update_progress(total_frames, c))
+
+                if proc is not None:
+                    try:
+                        proc.stdin.close()
+                    except OSError:
+                        # 残りのデータを流し込む前にエンコーダが終了していた
+                        pass
+                    err = proc.stderr.read()
+                    if proc.wait() != 0:
+                        _reset_h264_encoder()
+                        raise RuntimeError(f"ffmpeg でのエンコードに失敗しました: {err.decode('utf-8', 'replace').strip()}")
+                    proc = None
+                else:
+                    out.release()
                 
                 # 操作ログを抽出してTSV保存 (trajectory_data が存在する場合は常に実行)
                 # 操作ログを抽出してTSV保存 (元ファイルベースの加工)
@@ -638,57 +1044,100 @@ class ExportMixin:
                 self.root.after(0, _finish)
                 
             except Exception as e:
-                def _err():
+                # e は except ブロックを抜けると消えるため、メッセージはここで確定させる
+                msg = str(e)
+
+                def _err(msg=msg):
                     progress_win.destroy()
-                    messagebox.showerror("Error", f"動画保存中にエラーが発生しました:\n{e}")
+                    messagebox.showerror("Error", f"動画保存中にエラーが発生しました:\n{msg}")
                 self.root.after(0, _err)
             finally:
+                if proc is not None and proc.poll() is None:
+                    try:
+                        proc.kill()
+                    except Exception:
+                        pass
                 self.root.after(0, lambda: setattr(self, 'playing', was_playing))
                 if was_playing:
                     self.root.after(0, self.play_step)
 
-        import threading
         threading.Thread(target=_run_export, daemon=True).start()
 
-    def _draw_overlay_on_image(self, img_pil, current_time, history_manager, last_idx, offset_x=0, offset_y=0):
-        """画像にマウスと入力履歴のオーバーレイを描画する helper"""
+    def _get_trajectory_columns(self) -> tuple[list[float], list[int], list[str]]:
+        """trajectory_data を検索用の列に変換して返す. trajectory_data が差し替えられたら作り直す.
+
+        戻り値は (時刻列, クリックを離した行の番号列, その行で離されたボタン名の列)。
+        行ごとのタプルを毎フレーム辿らず、二分探索だけで最寄りの行と波紋の起点を求めるために使う。
+        """
+        data = self.trajectory_data
+        cache = getattr(self, '_trajectory_columns_cache', None)
+        if cache is None or cache[0] is not data or cache[1] != len(data):
+            times = [row[0] for row in data]
+            release_idx: list[int] = []
+            release_type: list[str] = []
+            prev_click = None
+            for k, row in enumerate(data):
+                click = row[3]
+                if prev_click is not None:
+                    # 前の行で押されていて、この行で離されたボタン (L, R, M の順に優先)
+                    for btn_char, btn_name in (("L", "left"), ("R", "right"), ("M", "middle")):
+                        if btn_char in prev_click and btn_char not in click:
+                            release_idx.append(k)
+                            release_type.append(btn_name)
+                            break
+                prev_click = click
+            cache = (data, len(data), times, release_idx, release_type)
+            self._trajectory_columns_cache = cache
+        return cache[2], cache[3], cache[4]
+
+    def _overlay_flags(self) -> tuple[bool, bool]:
+        """オーバーレイの表示設定 (マウス, 字幕) を返す. Tk 変数を読むためメインスレッドで呼ぶこと."""
+        show_mouse = self.show_trajectory_var.get() if hasattr(self, 'show_trajectory_var') else True
+        show_sub = self.show_subtitle_var.get() if hasattr(self, 'show_subtitle_var') else True
+        return bool(show_mouse), bool(show_sub)
+
+    def _draw_overlay_on_image(self, img_pil, current_time, history_manager, last_idx, offset_x=0, offset_y=0,
+                               flags=None):
+        """画像にマウスと入力履歴のオーバーレイを描画する helper
+
+        flags: _overlay_flags() の結果。書き出し中はワーカースレッドから呼ばれるため、
+        開始前に読んでおいた値を渡す (None ならここで Tk 変数を読む)。
+        """
         if not hasattr(self, 'trajectory_data') or not self.trajectory_data:
             return last_idx
 
         # 設定の取得
-        show_mouse = self.show_trajectory_var.get() if hasattr(self, 'show_trajectory_var') else True
-        show_sub = self.show_subtitle_var.get() if hasattr(self, 'show_subtitle_var') else True
+        show_mouse, show_sub = flags if flags is not None else self._overlay_flags()
         
         if not show_mouse and not show_sub:
             return last_idx
 
-        # 1. 該当するマウスデータの検索 (last_idx から開始)
+        # 1. 該当するマウスデータの検索 (last_idx 以降から二分探索)
         mouse_data = None
-        current_row_idx = -1
         
         # タイムスタンプが current_time に最も近いものを探す
-        # ただし、過去のものはスキップして高速化
+        # ただし、過去のものはスキップする
         start_search = max(0, last_idx)
-        n = len(self.trajectory_data)
+        ts, release_idx, release_type = self._get_trajectory_columns()
+        n = len(ts)
         
         best_diff = float('inf')
         best_idx = -1
         
-        # 少し先まで探す (データの粒度にもよるが、1秒分くらい見れば十分)
-        # ここでは簡易的に、current_time を超えて diff が増え始めたら終了
-        for i in range(start_search, n):
-            row = self.trajectory_data[i]
-            t = row[0]
-            diff = abs(t - current_time)
-            
-            if diff < best_diff:
-                best_diff = diff
+        if start_search < n:
+            # 時刻順に並んでいるので、最も近いのは current_time の直前か直後の行
+            i = bisect.bisect_left(ts, current_time, start_search)
+            if i < n:
                 best_idx = i
-                mouse_data = row
-            else:
-                # 差が広がり始めたら終了 (ただし t < current_time の場合は近づいてる途中かもしれないので注意)
-                if t > current_time:
-                    break
+                best_diff = abs(ts[i] - current_time)
+            if i > start_search:
+                diff = abs(ts[i - 1] - current_time)
+                if diff <= best_diff:
+                    # 差が同じなら前の行を優先し、同時刻の行が続く場合はその先頭を採用する
+                    best_idx = bisect.bisect_left(ts, ts[i - 1], start_search, i)
+                    best_diff = diff
+            if best_idx >= 0:
+                mouse_data = self.trajectory_data[best_idx]
         
         # マッチした行があればそこを新しい last_idx とする
         new_last_idx = best_idx if best_idx >= 0 else last_idx
@@ -711,20 +1160,14 @@ class ExportMixin:
             ripple_age = 0.0
             ripple_type = ""
             if best_idx > 0:
-                 # 少し遡ってクリック開始を探す
-                 lookback = 0.5
-                 for k in range(best_idx, max(0, best_idx - 30), -1):
-                     tr = self.trajectory_data
-                     if t_curr - tr[k][0] > lookback: break
-                     if k > 0:
-                         c_c = tr[k][3]
-                         c_p = tr[k-1][3]
-                         for btn_char, btn_name in [("L", "left"), ("R", "right"), ("M", "middle")]:
-                            if btn_char in c_p and btn_char not in c_c:
-                                ripple_type = btn_name
-                                ripple_age = t_curr - tr[k][0]
-                                break
-                         if ripple_type: break
+                # 少し遡って (0.5秒・30行以内) 直近でクリックを離した行を探す
+                lookback = 0.5
+                j = bisect.bisect_right(release_idx, best_idx) - 1
+                if j >= 0:
+                    k = release_idx[j]
+                    if k > best_idx - 30 and t_curr - ts[k] <= lookback:
+                        ripple_type = release_type[j]
+                        ripple_age = t_curr - ts[k]
 
             overlay_utils.draw_mouse_overlay(
                 img_pil, draw_x, draw_y, click, 
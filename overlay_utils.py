@@ -3,7 +3,8 @@ PILを使用して画像に直接描画することで透過表示に対応し
 """
 from __future__ import annotations
 
-from typing import Dict, Any, List, Optional, Tuple
+from collections import deque
+from typing import Deque, Dict, Any, List, Optional, Tuple
 from PIL import Image, ImageDraw, ImageFont
 
 
@@ -110,15 +111,44 @@ def draw_mouse_overlay(
     ripple_type: str = ""
 ):
     """マウスのポインタとクリック箇所を画像に描画する."""
-    # RGBAのオーバーレイレイヤーを作成してそこに描画
-    overlay = Image.new("RGBA", img.size, (0, 0, 0, 0))
-    draw = ImageDraw.Draw(overlay, "RGBA")
     m_cfg = theme.get("mouse_overlay", {})
-    
+    p_cfg = m_cfg.get("pointer", {})
+
     # 画像内の座標
     ix = x * scale_x
     iy = y * scale_y
 
+    # 描画が届く範囲 (ポインタ中心からの距離) を見積もる
+    # 画像全体ではなくこの範囲だけのレイヤーを作って合成し、フレームごとの確保・合成コストを抑える
+    reach = 12.0
+    max_width = p_cfg.get("width", 2)
+    for c_cfg in (m_cfg.get("click_left"), m_cfg.get("click_right"), m_cfg.get("click_middle")):
+        if c_cfg:
+            max_width = max(max_width, c_cfg.get("width", 3))
+    if ripple_type and ripple_age > 0:
+        r_cfg = m_cfg.get(f"click_{ripple_type}")
+        if r_cfg:
+            reach = max(reach, 12 + r_cfg.get("ripple_range", 20))
+    p_r = p_cfg.get("radius", 6)
+    # カーソル形状は半径の 2.2 倍まで伸びる
+    reach = max(reach, p_r * 2.2)
+    reach = int(reach + max_width + 2)
+
+    img_w, img_h = img.size
+    left = max(0, int(ix) - reach)
+    top = max(0, int(iy) - reach)
+    right = min(img_w, int(ix) + reach + 1)
+    bottom = min(img_h, int(iy) + reach + 1)
+    if left >= right or top >= bottom:
+        # 画像外なので描画するものがない
+        return
+
+    # RGBAのオーバーレイレイヤーを作成してそこに描画 (座標はレイヤー基準に整数シフト)
+    overlay = Image.new("RGBA", (right - left, bottom - top), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay, "RGBA")
+    ix -= left
+    iy -= top
+
     # 1. 進行中のクリック表現 (押しっぱなし)
     if click_info and click_info != "None":
         c_cfg = None
@@ -170,7 +200,6 @@ def draw_mouse_overlay(
                     draw.polygon(_get_star_points(ix, iy, r, spin_angle), outline=color, width=width)
 
     # 3. ポインタ本体
-    p_cfg = m_cfg.get("pointer", {})
     p_color_hex = p_cfg.get("color", "#FF0000")
     p_color = _hex_to_rgba(p_color_hex, 255) if p_color_hex else None
     p_fill_hex = p_cfg.get("fill", "")
@@ -178,7 +207,6 @@ def draw_mouse_overlay(
     
     p_width = p_cfg.get("width", 2)
     p_shape = p_cfg.get("shape", "circle")
-    p_r = p_cfg.get("radius", 6)
 
     if p_shape == "circle":
         draw.ellipse([ix - p_r, iy - p_r, ix + p_r, iy + p_r], outline=p_color, width=p_width, fill=p_fill)
@@ -207,11 +235,11 @@ def draw_mouse_overlay(
         outline_c = p_color if p_color else (0, 0, 0, 255)
         draw.polygon(arrow_points, fill=fill_color, outline=outline_c)
 
-    # 描画済みレイヤーを元の画像に合成
+    # 描画済みレイヤーを元の画像の該当位置に合成
     if img.mode == "RGBA":
-        img.alpha_composite(overlay)
+        img.alpha_composite(overlay, (left, top))
     else:
-        img.paste(overlay, (0, 0), overlay)
+        img.paste(overlay, (left, top), overlay)
 
 
 def draw_input_overlay(
@@ -371,16 +399,23 @@ def draw_input_overlay(
         if current_y < -unit_h or current_y > img_h + unit_h:
             break
 
-    # 描画済みレイヤーを元の画像に合成
+    # 描画済みレイヤーのうち実際に描かれた範囲だけを元の画像に合成
+    bbox = overlay.getbbox()
+    if bbox is None:
+        return
+    region = overlay.crop(bbox)
     if img.mode == "RGBA":
-        img.alpha_composite(overlay)
+        img.alpha_composite(region, bbox[:2])
     else:
-        img.paste(overlay, (0, 0), overlay)
+        img.paste(region, bbox[:2], region)
 
 
 class InputHistoryManager:
+    # 保持する履歴の上限 (10秒以内の入力でもこれを超えたら古いものから捨てる)
+    MAX_HISTORY = 100
+
     def __init__(self):
-        self.history = []  # (text, timestamp)
+        self.history: Deque[Tuple[str, float]] = deque(maxlen=self.MAX_HISTORY)  # (text, timestamp) 古い順
         self.last_text = None
         self.last_time = -1.0
         # 連続入力とみなす時間は呼び出し元で調整してもよいが、ここでは固定
@@ -410,8 +445,10 @@ class InputHistoryManager:
         self.last_time = current_time
         
         # 古すぎる履歴は削除 (描画時にフィルタリングするのでここでは緩めに)
-        # 10秒以上前のものは不要
-        self.history = [h for h in self.history if current_time - h[1] < 10.0]
+        # 10秒以上前のものは不要。古い順に並んでいるので先頭から落とすだけでよい
+        history = self.history
+        while history and current_time - history[0][1] >= 10.0:
+            history.popleft()
 
     def get_active_inputs(self, current_time, fade_duration):
         """現在表示すべき入力リスト (テキスト, 経過時間) を返す. 新しい順"""
@@ -14,6 +14,15 @@ import numpy as np
 from window_utils import WindowUtils
 from wgc_capture import WGCCapture
 
+if os.name == "nt":
+    # 入力状態の取得は録画中に毎フレーム数十回呼ぶため、型を指定したうえで一度だけ解決しておく
+    # (ctypes.windll 側の共有関数オブジェクトの argtypes を書き換えないよう別インスタンスを使う)
+    _user32 = ctypes.WinDLL("user32")
+
+    _GetAsyncKeyState = _user32.GetAsyncKeyState
+    _GetAsyncKeyState.argtypes = [ctypes.c_int]
+    _GetAsyncKeyState.restype = ctypes.c_short
+
 
 class ScreenRecorderLogic:
     """録画処理の実行・管理を行うクラス."""
@@ -212,11 +221,12 @@ class ScreenRecorderLogic:
 
     def _get_input_state(self) -> tuple[str, List[str]]:
         """現在のマウス・キーボード入力状態を取得する."""
+        get_key_state = _GetAsyncKeyState
         # クリック状態の取得
         click_info = ""
-        if ctypes.windll.user32.GetAsyncKeyState(0x01) & 0x8000: click_info += "L"
-        if ctypes.windll.user32.GetAsyncKeyState(0x02) & 0x8000: click_info += "R"
-        if ctypes.windll.user32.GetAsyncKeyState(0x04) & 0x8000: click_info += "M"
+        if get_key_state(0x01) & 0x8000: click_info += "L"
+        if get_key_state(0x02) & 0x8000: click_info += "R"
+        if get_key_state(0x04) & 0x8000: click_info += "M"
         
         if not click_info:
             click_info = "None"
@@ -224,49 +234,49 @@ class ScreenRecorderLogic:
         # キー状態の取得
         keys_info = []
         # 修飾キー
-        if ctypes.windll.user32.GetAsyncKeyState(0x10) & 0x8000: keys_info.append("Shift")
-        if ctypes.windll.user32.GetAsyncKeyState(0x11) & 0x8000: keys_info.append("Ctrl")
-        if ctypes.windll.user32.GetAsyncKeyState(0x12) & 0x8000: keys_info.append("Alt")
-        if (ctypes.windll.user32.GetAsyncKeyState(0x5B) & 0x8000) or (ctypes.windll.user32.GetAsyncKeyState(0x5C) & 0x8000):
+        if get_key_state(0x10) & 0x8000: keys_info.append("Shift")
+        if get_key_state(0x11) & 0x8000: keys_info.append("Ctrl")
+        if get_key_state(0x12) & 0x8000: keys_info.append("Alt")
+        if (get_key_state(0x5B) & 0x8000) or (get_key_state(0x5C) & 0x8000):
             keys_info.append("Win")
         # 稀に 0x5B/0x5C で取れない環境があるための予備判定 (VK_LWIN/VK_RWIN は標準的なので基本は通るはず)
         
         # 一般キー
         for vk, name in [(0x0D, "Enter"), (0x20, "Space"), (0x1B, "Esc"), (0x08, "BS"), (0x09, "Tab"), (0x2E, "Del")]:
-            if ctypes.windll.user32.GetAsyncKeyState(vk) & 0x8000:
+            if get_key_state(vk) & 0x8000:
                 keys_info.append(name)
         
         # ナビゲーションキー
         for vk, name in [
             (0x21, "PageUp"), (0x22, "PageDown"), (0x23, "End"), (0x24, "Home"), (0x2D, "Insert")
         ]:
-            if ctypes.windll.user32.GetAsyncKeyState(vk) & 0x8000:
+            if get_key_state(vk) & 0x8000:
                 keys_info.append(name)
 
         # 方向キー
         for vk, name in [(0x25, "Left"), (0x26, "Up"), (0x27, "Right"), (0x28, "Down")]:
-            if ctypes.windll.user32.GetAsyncKeyState(vk) & 0x8000:
+            if get_key_state(vk) & 0x8000:
                 keys_info.append(name)
 
         # ファンクションキー (F1-F12)
         for vk in range(0x70, 0x7C):
             name = f"F{vk - 0x6F}"
-            if ctypes.windll.user32.GetAsyncKeyState(vk) & 0x8000:
+            if get_key_state(vk) & 0x8000:
                 keys_info.append(name)
 
         # その他特殊キー
         for vk, name in [(0x2C, "PrintScreen"), (0x13, "Pause"), (0x14, "CapsLock"), (0x91, "ScrollLock")]:
-            if ctypes.windll.user32.GetAsyncKeyState(vk) & 0x8000:
+            if get_key_state(vk) & 0x8000:
                 keys_info.append(name)
 
         # A-Z
         for vk in range(0x41, 0x5B):
-            if ctypes.windll.user32.GetAsyncKeyState(vk) & 0x8000:
+            if get_key_state(vk) & 0x8000:
                 keys_info.append(chr(vk))
         
         # 0-9
         for vk in range(0x30, 0x3A):
-            if ctypes.windll.user32.GetAsyncKeyState(vk) & 0x8000:
+            if get_key_state(vk) & 0x8000:
                 keys_info.append(chr(vk))
         
         return click_info, keys_info
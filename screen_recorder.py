@@ -7,6 +7,7 @@ from __future__ import annotations
 import ctypes
 import datetime
 import os
+import queue
 import threading
 import time
 import tkinter as tk
@@ -17,13 +18,14 @@ from typing import TYPE_CHECKING, Optional, List, Tuple, Dict, Any
 import cv2
 import mss
 import numpy as np
-from PIL import Image, ImageTk
+from PIL import Image, ImageChops, ImageTk
 
 from config import get_base_dir, load_global_config, save_global_config, PROJECT_NAME
-from utils import resource_path
+from utils import open_video_capture, resource_path
 from ui_utils import add_tooltip
 from window_utils import WindowUtils
 from recorder_core import ScreenRecorderLogic
+from wgc_capture import WGCCapture, WGC_AVAILABLE
 import overlay_utils
 
 if TYPE_CHECKING:
@@ -50,6 +52,20 @@ class ScreenRecorderApp:
     # リージョン設定
     REGION_THICKNESS = 5
     REGION_COLOR = "red"
+
+    # プレビュー更新間隔 (ms)
+    PREVIEW_INTERVAL_HOT_MS = 50        # アプリにフォーカスがある
+    PREVIEW_INTERVAL_WARM_MS = 250      # 他のアプリを操作中
+    PREVIEW_INTERVAL_RECORDING_MS = 500 # 録画中は録画処理を優先
+
+    # 赤枠追従の間隔 (ms)
+    REGION_TRACKING_HOT_MS = 50    # 対象の矩形が直近で変化した
+    REGION_TRACKING_WARM_MS = 200  # 対象が静止している
+    REGION_TRACKING_COLD_MS = 500  # 録画ツールが最小化されている (非録画時)
+    REGION_TRACKING_SETTLE_SEC = 1.0 # 最後の変化からこの秒数経てば静止とみなす
+
+    # 検索入力中にウィンドウ一覧を使い回す時間 (秒)
+    ENUM_CACHE_SEC = 2.0
     
     def __init__(self, root: Optional[tk.Tk] = None, parent_app: Optional[VideoCropperApp] = None):
         self.window_utils = WindowUtils()
@@ -90,6 +106,7 @@ class ScreenRecorderApp:
 
         # 状態変数
         self.preview_active = True
+        self._preview_paused = False # 非表示のためプレビューループを止めているか
         
         # 再生状態変数
         self.cap: Optional[cv2.VideoCapture] = None
@@ -104,12 +121,19 @@ class ScreenRecorderApp:
         # 赤枠表示の安定性管理用
         self.last_target_rect = None
         self.last_rect_change_time = 0.0
+        self._last_pushed_geo: Optional[Tuple[int, int, int, int]] = None # 座標欄へ最後に反映した (x, y, w, h)
+        self._apply_geo_job: Optional[str] = None # 座標適用のまとめ処理用 after ID
         self.STABILITY_THRESHOLD = 0.1 # 秒
         
         # UI変数
         self.source_var = tk.StringVar(value="desktop") # desktop / window
         self.target_var = tk.StringVar()
         self.filter_var = tk.StringVar() # ウィンドウ検索用
+        self._filter_job: Optional[str] = None # 検索入力のデバウンス用 after ID
+        # 検索入力中は EnumWindows をやり直さず、直近の全ウィンドウ一覧を絞り込むだけにする
+        self._enum_cache: Optional[List[Tuple[Any, str, str, int]]] = None
+        self._enum_cache_lower: List[Tuple[str, str]] = [] # _enum_cache の (タイトル, プロセス名) 小文字
+        self._enum_expiry = 0.0
         self.fps_var = tk.IntVar(value=15)
         self.quality_var = tk.StringVar(value="最高")
         self.save_path_var = tk.StringVar(value=self.save_dir)
@@ -136,6 +160,16 @@ class ScreenRecorderApp:
         self._preview_panning = False
         self._preview_pan_start = (0, 0)
 
+        # プレビュー用 WGC セッション (新着フレームがあるときだけ描画する)
+        self._preview_wgc: Optional[WGCCapture] = None
+        self._preview_wgc_hwnd = None
+
+        # プレビューワーカースレッドとの受け渡し
+        self._preview_request: Optional[Dict[str, Any]] = None
+        self._preview_wakeup = threading.Event()
+        self._preview_queue: queue.Queue = queue.Queue(maxsize=1)
+        self._preview_thread: Optional[threading.Thread] = None
+
         # 共通設定 (テーマ) のロード
         self.global_config = load_global_config()
         self.theme = self.global_config.get("theme", {})
@@ -151,12 +185,20 @@ class ScreenRecorderApp:
 
         self.widgets_to_lock: List[tk.Widget] = []
         self.region_window: Optional[tk.Toplevel] = None
+        self._region_window_rect: Optional[Dict[str, int]] = None # 赤枠に反映済みの矩形
+        self._region_tracking_id = None
+        self._tracked_target_rect: Tuple[float, Optional[Dict[str, int]]] = (0.0, None) # 追従ループで取得した (時刻, 矩形)
         self.monitors: List[Dict[str, Any]] = []
         self.windows: List[Tuple[Any, str, str, int]] = [] # (hwnd, title, process_name, pid)
+        # 現在選択中の録画対象 (on_target_changed で更新)
+        self._sel_index: int = -1
+        self._sel_hwnd: Optional[int] = None
         self.file_items: List[str] = [] # 一覧に表示されている実際のファイル名
         
         self._build_ui()
         self.update_source_list()
+        self._preview_thread = threading.Thread(target=self._preview_worker, daemon=True)
+        self._preview_thread.start()
         self._start_preview()
         
         # ウィンドウ状態の復元
@@ -166,6 +208,8 @@ class ScreenRecorderApp:
         
         # タブ切り替えイベント
         self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+        # 最小化からの復帰でプレビューを再開する
+        self.root.bind("<Map>", lambda e: self._resume_preview(), add="+")
         
         # 初期表示の追従開始
         if self.notebook.select() == str(self.tab_record):
@@ -176,6 +220,7 @@ class ScreenRecorderApp:
         current_tab = self.notebook.select()
         if current_tab == str(self.tab_record):
             self._update_region_tracking()
+            self._resume_preview()
         else:
             self._hide_recording_region()
 
@@ -230,7 +275,6 @@ class ScreenRecorderApp:
     def on_close(self):
         """終了時の処理."""
         self.save_window_geometry()
-        self.preview_active = False
         
         if self.recorder_logic.is_recording:
             if messagebox.askyesno("確認", "録画中です。停止して閉じますか？", parent=self.root):
@@ -239,6 +283,11 @@ class ScreenRecorderApp:
             else:
                 return
 
+        # プレビューワーカーを停止 (キャンセル時は継続させるため確認後に行う)
+        self.preview_active = False
+        self._preview_wakeup.set()
+        self.window_utils.release_gdi_cache()
+
         if self.cap:
             self.cap.release()
             
@@ -346,7 +395,7 @@ class ScreenRecorderApp:
         filter_frame = tk.Frame(self.tab_record)
         filter_frame.pack(fill=tk.X, padx=10, pady=0)
         tk.Label(filter_frame, text="検索:").pack(side=tk.LEFT)
-        self.filter_var.trace_add("write", lambda *args: self.update_source_list())
+        self.filter_var.trace_add("write", lambda *args: self._schedule_source_list_update())
         self.entry_filter = tk.Entry(filter_frame, textvariable=self.filter_var)
         self.entry_filter.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
         self.widgets_to_lock.append(self.entry_filter)
@@ -370,6 +419,8 @@ class ScreenRecorderApp:
         self.geo_y = tk.IntVar()
         self.geo_w = tk.IntVar()
         self.geo_h = tk.IntVar()
+        # 周期更新で IntVar.set のラッパーを経由せず Tcl 変数へ直接書き込むための変数名
+        self._geo_var_names = (str(self.geo_x), str(self.geo_y), str(self.geo_w), str(self.geo_h))
         
         tk.Label(geo_frame, text="座標 X:").pack(side=tk.LEFT)
         self.entry_x = tk.Entry(geo_frame, textvariable=self.geo_x, width=5)
@@ -404,6 +455,9 @@ class ScreenRecorderApp:
         self.preview_canvas = tk.Canvas(preview_label_frame, bg=self.COLOR_CANVAS_BG, highlightthickness=0)
         self.preview_canvas.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         self.preview_image_id = None
+        self._preview_tk_img: Optional[ImageTk.PhotoImage] = None
+        self._preview_offset: Optional[Tuple[int, int]] = None
+        self._preview_resize_buf: Optional[np.ndarray] = None # ワーカー専用のリサイズ先バッファ
         self.preview_canvas.bind("<Configure>", lambda e: self._on_canvas_resize("preview"))
         self.preview_canvas.bind("<ButtonPress-2>", self._on_preview_middle_down)
         self.preview_canvas.bind("<B2-Motion>", self._on_preview_middle_drag)
@@ -529,25 +583,18 @@ class ScreenRecorderApp:
             target_proc = self.global_config.get("recorder_target_process")
             
             if target_pid or target_proc:
+                # Priority 1: PID Match / Priority 2: Process Name Match を1パスで判定
                 best_idx = 0
-                found = False
-                
-                # Priority 1: PID Match
-                if target_pid:
-                    for i, win in enumerate(self.windows):
-                        # win = (hwnd, title, pname, pid)
-                        if win[3] == target_pid:
-                            best_idx = i
-                            found = True
-                            break
-                
-                # Priority 2: Process Name Match (if PID mismatch)
-                if not found and target_proc:
-                    for i, win in enumerate(self.windows):
-                        if win[2] == target_proc:
-                            best_idx = i
-                            found = True
-                            break
+                proc_idx = None
+                for i, (_hwnd, _title, pname, pid) in enumerate(self.windows):
+                    if target_pid and pid == target_pid:
+                        best_idx = i
+                        break
+                    if proc_idx is None and target_proc and pname == target_proc:
+                        proc_idx = i
+                else:
+                    if proc_idx is not None:
+                        best_idx = proc_idx
                 
                 self.combo_target.current(best_idx)
             else:
@@ -555,15 +602,33 @@ class ScreenRecorderApp:
                 if display_names:
                     self.combo_target.current(0)
 
-    def update_source_list(self):
-        """録画対象のリストを更新"""
+    def _schedule_source_list_update(self):
+        """検索入力の確定を待ってからリストを更新する (1文字ごとの EnumWindows を避ける)"""
+        if self._filter_job is not None:
+            self.root.after_cancel(self._filter_job)
+        self._filter_job = self.root.after(150, lambda: self.update_source_list(use_cache=True))
+
+    def update_source_list(self, use_cache: bool = False):
+        """録画対象のリストを更新
+
+        Args:
+            use_cache: True なら直近 (ENUM_CACHE_SEC 以内) に取得したウィンドウ一覧を再利用する。
+                       検索入力時のみ指定し、更新ボタン等では常に取り直す。
+        """
+        if self._filter_job is not None:
+            # 直接呼ばれた場合は保留中のデバウンス更新を破棄する
+            try:
+                self.root.after_cancel(self._filter_job)
+            except Exception:
+                pass
+            self._filter_job = None
         self.combo_target['values'] = []
         mode = self.source_var.get()
         filter_text = self.filter_var.get().lower() if hasattr(self, 'filter_var') else ""
         
         if mode == 'desktop':
-            # モニター一覧取得
-            self.monitors = self.window_utils.get_monitor_info()
+            # モニター一覧取得 (一覧更新時はモニター構成の変化も拾う)
+            self.monitors = self.window_utils.get_monitor_info(refresh=True)
             display_names = [f"Display {i+1}: {m['width']}x{m['height']}" for i, m in enumerate(self.monitors)]
             self.combo_target['values'] = display_names
             
@@ -579,8 +644,13 @@ class ScreenRecorderApp:
                 w.config(state=tk.DISABLED)
                 
         elif mode == 'window':
-            # ウィンドウ一覧取得
-            self.windows = self.window_utils.enum_windows(filter_text)
+            # ウィンドウ一覧取得 (全件をキャッシュし、検索文字列での絞り込みは Python 側で行う)
+            now = time.monotonic()
+            if not use_cache or self._enum_cache is None or now >= self._enum_expiry:
+                self._enum_cache = self.window_utils.enum_windows()
+                self._enum_cache_lower = WindowUtils.lower_window_names(self._enum_cache)
+                self._enum_expiry = now + self.ENUM_CACHE_SEC
+            self.windows = WindowUtils.filter_windows(self._enum_cache, filter_text, self._enum_cache_lower)
             display_names = [f"[{p}] {t} ({h})" for h, t, p, pid in self.windows]
             self.combo_target['values'] = display_names
             
@@ -596,20 +666,41 @@ class ScreenRecorderApp:
         self.on_target_changed(None)
 
     def on_target_changed(self, event):
+        # 選択中の項目を Python 側に控えておき、周期処理で Combobox (Tcl) を問い合わせずに済ませる
+        idx = self.combo_target.current()
+        self._sel_index = idx
+        if self.source_var.get() == 'window' and 0 <= idx < len(self.windows):
+            self._sel_hwnd = self.windows[idx][0]
+        else:
+            self._sel_hwnd = None
+        self._tracked_target_rect = (0.0, None) # 対象が変わったので共有中の矩形は破棄
         rect = self._get_target_rect()
         if rect:
-            self.geo_x.set(rect['left'])
-            self.geo_y.set(rect['top'])
-            self.geo_w.set(rect['width'])
-            self.geo_h.set(rect['height'])
+            self._set_geo_vars((rect['left'], rect['top'], rect['width'], rect['height']))
             # 赤枠の表示・更新は _update_region_tracking 内の安定性ロジックに任せる
 
+    def _set_geo_vars(self, geo: Tuple[int, int, int, int]):
+        """座標・サイズ欄 (geo_x/y/w/h) へ (x, y, w, h) をまとめて書き込む."""
+        globalsetvar = self.root.tk.globalsetvar
+        for name, value in zip(self._geo_var_names, geo):
+            globalsetvar(name, value)
+        self._last_pushed_geo = geo
+
     def apply_window_geometry(self):
+        """入力ボックスの値でウィンドウを移動・リサイズ (連続した操作は1回にまとめる)"""
+        # Return / Tab / ボタンが続けて来ても SetWindowPos は最後に1回だけ行う
+        if self._apply_geo_job is None:
+            self._apply_geo_job = self.root.after(40, self._flush_apply_window_geometry)
+
+    def _flush_apply_window_geometry(self):
+        self._apply_geo_job = None
+        self._apply_window_geometry_now()
+
+    def _apply_window_geometry_now(self):
         """入力ボックスの値でウィンドウを移動・リサイズ"""
         if self.source_var.get() == 'window':
-            idx = self.combo_target.current()
-            if idx >= 0 and idx < len(self.windows):
-                hwnd = self.windows[idx][0]
+            hwnd = self._sel_hwnd
+            if hwnd:
                 try:
                     x = self.geo_x.get()
                     y = self.geo_y.get()
@@ -633,7 +724,7 @@ class ScreenRecorderApp:
         """録画対象の矩形を取得"""
         mode = self.source_var.get()
         if mode == 'desktop':
-            idx = self.combo_target.current()
+            idx = self._sel_index
             if idx >= 0 and idx < len(self.monitors):
                 return self.monitors[idx]
             # fallback
@@ -641,91 +732,274 @@ class ScreenRecorderApp:
             if mons: return mons[0]
             
         elif mode == 'window':
-            idx = self.combo_target.current()
-            if idx >= 0 and idx < len(self.windows):
-                hwnd = self.windows[idx][0]
-                return self.window_utils.get_window_rect(hwnd)
+            if self._sel_hwnd:
+                return self.window_utils.get_window_rect(self._sel_hwnd)
         
         return None
 
     def _start_preview(self):
-        """プレビュー更新ループ"""
+        """プレビュー更新ループ (Tk メインスレッド側).
+
+        キャプチャとリサイズは _preview_worker スレッドで行い、
+        ここでは要求の発行と完成した画像のキャンバス反映だけを行う。
+        """
         if not self.preview_canvas.winfo_exists():
             return
-            
+
+        # 最小化中や別タブ表示中は誰も見ていないので、ループ自体を止める
+        # (<Map> / タブ切り替えで _resume_preview から再開する)
+        if self.root.state() == 'iconic' or not self.preview_canvas.winfo_viewable():
+            self._preview_paused = True
+            return
+
         if self.preview_active:
-            rect = self._get_target_rect()
-            if rect:
+            try:
+                request = self._build_preview_request()
+                if request:
+                    self._preview_request = request
+                    self._preview_wakeup.set()
+
                 try:
-                    capture_success = False
+                    img = self._preview_queue.get_nowait()
+                except queue.Empty:
                     img = None
 
-                    # ウィンドウ個別キャプチャ
-                    if self.source_var.get() == 'window' and self.exclusive_window_var.get():
-                        idx = self.combo_target.current()
-                        if idx >= 0 and idx < len(self.windows):
-                            hwnd = self.windows[idx][0]
-                            frame_bgr = self.window_utils.capture_exclusive_window(hwnd)
-                            if frame_bgr is not None:
-                                frame_rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
-                                img = Image.fromarray(frame_rgb)
-                                capture_success = True
-                    
-                    # 通常キャプチャ
-                    if not capture_success:
-                        # mssのgrabはモニター座標系
-                        # モニタ外の座標などを指定するとエラーになる場合があるため注意
-                        # ここでは rect が正しいと仮定
-                        img_sct = self.window_utils.sct.grab(rect)
-                        img = Image.frombytes("RGB", img_sct.size, img_sct.bgra, "raw", "BGRX")
-                        capture_success = True
-                    
-                    if capture_success and img:
-                        # update canvas logic
-                        cw = self.preview_canvas.winfo_width()
-                        ch = self.preview_canvas.winfo_height()
-                        if cw > 1 and ch > 1:
-                            img_w, img_h = img.size
-                            if self.preview_fit_var.get():
-                                # 比例リサイズ
-                                ratio = min(cw / img_w, ch / img_h)
-                                new_w = int(img_w * ratio)
-                                new_h = int(img_h * ratio)
-                                if new_w > 0 and new_h > 0:
-                                    img = img.resize((new_w, new_h), Image.Resampling.LANCZOS)
-                                
-                                # 中央配置
-                                off_x = (cw - img.width) // 2
-                                off_y = (ch - img.height) // 2
-                            else:
-                                # パン・ズーム
-                                scale_view = self.preview_zoom
-                                new_w = int(img_w * scale_view)
-                                new_h = int(img_h * scale_view)
-                                if new_w > 0 and new_h > 0:
-                                    img = img.resize((new_w, new_h), Image.Resampling.LANCZOS)
-                                
-                                off_x = cw // 2 + self.preview_pan_x - img.width // 2
-                                off_y = ch // 2 + self.preview_pan_y - img.height // 2
-
-                            tk_img = ImageTk.PhotoImage(img)
-                            
-                            if self.preview_image_id:
-                                self.preview_canvas.itemconfig(self.preview_image_id, image=tk_img)
-                                # アンカーをNWに変更して座標指定
-                                self.preview_canvas.coords(self.preview_image_id, off_x, off_y)
-                                self.preview_canvas.itemconfig(self.preview_image_id, anchor=tk.NW)
-                            else:
-                                self.preview_image_id = self.preview_canvas.create_image(off_x, off_y, image=tk_img, anchor=tk.NW)
-                            
-                            self.preview_canvas.image = tk_img
-                except Exception as e:
-                    pass
+                if img is not None:
+                    self._update_preview_canvas(img)
+            except Exception as e:
+                pass
 
-        # 録画ループ依存ではなくなったが、プレビュー更新頻度は調整
-        interval = 100 if not self.recorder_logic.is_recording else 500
+        # 録画中・フォーカスの有無に応じてプレビュー更新頻度を調整
+        if self.recorder_logic.is_recording:
+            interval = self.PREVIEW_INTERVAL_RECORDING_MS
+        else:
+            try:
+                focused = self.root.focus_get() is not None
+            except Exception:
+                # Combobox のドロップダウン表示中などは KeyError になるが、操作中とみなす
+                focused = True
+            interval = self.PREVIEW_INTERVAL_HOT_MS if focused else self.PREVIEW_INTERVAL_WARM_MS
         self.root.after(interval, self._start_preview)
 
+    def _resume_preview(self):
+        """非表示で止めていたプレビューループを再開する."""
+        if self._preview_paused and self.preview_active:
+            self._preview_paused = False
+            self._start_preview()
+
+    def _build_preview_request(self) -> Optional[Dict[str, Any]]:
+        """ワーカースレッドに渡すキャプチャ条件を Tk 変数から組み立てる."""
+        # 赤枠追従ループが取得したばかりの矩形があればそれを使い、Win32 呼び出しを省く
+        # (追従ループは対象が動いている間 50ms 周期、静止中は 200ms 周期)
+        fetched_at, rect = self._tracked_target_rect
+        if time.time() - fetched_at > self.REGION_TRACKING_WARM_MS / 1000 + 0.05:
+            rect = self._get_target_rect()
+        if not rect:
+            return None
+
+        hwnd = None
+        if self.source_var.get() == 'window' and self.exclusive_window_var.get():
+            hwnd = self._sel_hwnd
+
+        return {
+            'rect': dict(rect),
+            'hwnd': hwnd,
+            'view': (
+                self.preview_canvas.winfo_width(), self.preview_canvas.winfo_height(),
+                self.preview_fit_var.get(), self.preview_zoom,
+            ),
+        }
+
+    def _preview_worker(self):
+        """プレビュー用のキャプチャ・リサイズを行うワーカースレッド.
+
+        cv2 / PIL / mss のネイティブ処理は GIL を解放するため、UI スレッドを塞がない。
+        完成した PIL 画像は最新の1枚だけをキューに置く。
+        """
+        last_wgc: Optional[WGCCapture] = None
+        last_seq = 0
+        last_view = None
+        last_img: Optional[Image.Image] = None
+        try:
+            with mss.mss() as sct:
+                while self.preview_active:
+                    if not self._preview_wakeup.wait(0.5):
+                        continue
+                    self._preview_wakeup.clear()
+                    request = self._preview_request
+                    if not request:
+                        continue
+
+                    try:
+                        frame = None
+                        rawmode = "BGR"
+                        view = request['view']
+                        hwnd = request['hwnd']
+
+                        # 対象ウィンドウが最小化・非表示の間は何も描けないので前回の表示を残す
+                        if hwnd and not self.window_utils.is_window_showing(hwnd):
+                            continue
+
+                        # ウィンドウ個別キャプチャ
+                        if hwnd:
+                            wgc = self._get_preview_wgc(hwnd)
+                            if wgc is not last_wgc:
+                                # 対象が変わってセッションが作り直されたら通し番号は 0 から数え直す
+                                last_wgc = wgc
+                                last_seq = 0
+                            if wgc is not None and wgc.frame_seq > 0:
+                                # 前回描画した番号より新しいフレームだけを受け取る
+                                frame, last_seq = wgc.get_frame_since(last_seq)
+                                if frame is None:
+                                    # 新着フレームも表示条件の変化もなければ描画をスキップ
+                                    if view == last_view:
+                                        continue
+                                    frame = wgc.get_latest_frame_bgra()
+                                # WGC の BGRA をそのまま使い、並べ替えは PIL のデコーダに任せる
+                                rawmode = "BGRX"
+                            else:
+                                # WGC が使えない、またはまだ最初のフレームが届いていない
+                                frame = self.window_utils.capture_exclusive_window(hwnd)
+
+                        # 通常キャプチャ
+                        if frame is None:
+                            # mssのgrabはモニター座標系
+                            # モニタ外の座標などを指定するとエラーになる場合があるため注意
+                            # ここでは rect が正しいと仮定
+                            frame = np.asarray(sct.grab(request['rect']))
+                            rawmode = "BGRX"
+
+                        img = self._resize_preview_image(frame, rawmode, view)
+                        if img is None:
+                            continue
+                        last_view = view
+
+                        # 縮小後の画像が前回と1ピクセルも変わらなければ Tk への転送自体を省く
+                        # (静止したデスクトップ等では毎回の PhotoImage 更新が丸ごと不要になる)
+                        if (last_img is not None and last_img.size == img.size
+                                and ImageChops.difference(last_img, img).getbbox() is None):
+                            continue
+                        last_img = img
+
+                        # 古い結果は捨てて最新の1枚だけを残す
+                        try:
+                            self._preview_queue.get_nowait()
+                        except queue.Empty:
+                            pass
+                        self._preview_queue.put_nowait(img)
+                    except Exception:
+                        pass
+        finally:
+            self._close_preview_wgc()
+
+    def _resize_preview_image(self, frame: np.ndarray, rawmode: str, view: tuple) -> Optional[Image.Image]:
+        """キャンバスサイズ・拡大率に合わせてプレビュー画像をリサイズし、PIL 画像にする.
+
+        frame は BGR (rawmode="BGR") または BGRA (rawmode="BGRX") の配列。
+        リサイズ先の配列は使い回し、表示サイズが変わったときだけ確保し直す。
+        """
+        cw, ch, fit, zoom = view
+        if cw <= 1 or ch <= 1:
+            return None
+
+        img_h, img_w = frame.shape[:2]
+        if fit:
+            # 比例リサイズ
+            ratio = min(cw / img_w, ch / img_h)
+        else:
+            # パン・ズーム
+            ratio = zoom
+        new_w = int(img_w * ratio)
+        new_h = int(img_h * ratio)
+        if new_w <= 0 or new_h <= 0:
+            new_w, new_h = img_w, img_h
+
+        if (new_w, new_h) != (img_w, img_h):
+            shape = (new_h, new_w, frame.shape[2])
+            buf = self._preview_resize_buf
+            if buf is None or buf.shape != shape:
+                buf = np.empty(shape, dtype=np.uint8)
+                self._preview_resize_buf = buf
+            # 位置合わせ用のプレビューなので、半分未満への大きな縮小だけ INTER_AREA (面積平均) で
+            # ちらつきを抑え、それ以外 (軽い縮小・拡大) はメモリ転送の少ない INTER_NEAREST で十分
+            interp = cv2.INTER_AREA if new_w * 2 < img_w else cv2.INTER_NEAREST
+            cv2.resize(frame, (new_w, new_h), dst=buf, interpolation=interp)
+            frame = buf
+
+        # BGR -> RGB の並べ替えは PIL のデコーダに任せる (ここでコピーされるので buf は再利用できる)
+        return Image.frombuffer("RGB", (new_w, new_h), np.ascontiguousarray(frame), "raw", rawmode, 0, 1)
+
+    def _update_preview_canvas(self, img: Image.Image):
+        """リサイズ済みのプレビュー画像をキャンバスに描画する.
+
+        PhotoImage は表示サイズが変わったときだけ作り直し、
+        それ以外は paste で中身だけを差し替えて Tk の画像生成を避ける。
+        """
+        tk_img = self._preview_tk_img
+        if tk_img is None or (tk_img.width(), tk_img.height()) != img.size:
+            # サイズ変更時のみ PhotoImage を作り直す
+            tk_img = ImageTk.PhotoImage(img)
+            self._preview_tk_img = tk_img
+            if self.preview_image_id:
+                self.preview_canvas.itemconfig(self.preview_image_id, image=tk_img)
+            else:
+                self.preview_image_id = self.preview_canvas.create_image(0, 0, image=tk_img, anchor=tk.NW)
+                self._preview_offset = (0, 0)
+        else:
+            # 同一サイズなら既存の PhotoImage へ上書きする
+            tk_img.paste(img)
+
+        self._place_preview_image(img.width, img.height)
+
+    def _place_preview_image(self, img_w: int, img_h: int):
+        """プレビュー画像をキャンバス中央 (パン考慮) に配置する. 位置が変わったときだけ coords を呼ぶ."""
+        cw = self.preview_canvas.winfo_width()
+        ch = self.preview_canvas.winfo_height()
+        if self.preview_fit_var.get():
+            # 中央配置
+            off_x = (cw - img_w) // 2
+            off_y = (ch - img_h) // 2
+        else:
+            off_x = cw // 2 + self.preview_pan_x - img_w // 2
+            off_y = ch // 2 + self.preview_pan_y - img_h // 2
+
+        if self._preview_offset != (off_x, off_y):
+            self.preview_canvas.coords(self.preview_image_id, off_x, off_y)
+            self._preview_offset = (off_x, off_y)
+
+    def _reposition_preview(self):
+        """表示中のプレビュー画像の配置だけを更新する (パン・キャンバスのリサイズ時)."""
+        if self._preview_tk_img is not None:
+            self._place_preview_image(self._preview_tk_img.width(), self._preview_tk_img.height())
+
+    def _get_preview_wgc(self, hwnd) -> Optional[WGCCapture]:
+        """プレビュー用の WGC セッションを返す. 対象ウィンドウが変わったら作り直す.
+
+        初期化に失敗した場合は None を返し、呼び出し側は PrintWindow にフォールバックする。
+        """
+        if hwnd == self._preview_wgc_hwnd:
+            return self._preview_wgc
+
+        self._close_preview_wgc()
+        self._preview_wgc_hwnd = hwnd
+        if WGC_AVAILABLE:
+            try:
+                wgc = WGCCapture(hwnd)
+                if wgc.session is not None:
+                    self._preview_wgc = wgc
+                else:
+                    wgc.close()
+            except Exception as e:
+                print(f"Preview WGC Startup Error: {e}")
+        return self._preview_wgc
+
+    def _close_preview_wgc(self):
+        """プレビュー用の WGC セッションを閉じる."""
+        if self._preview_wgc:
+            self._preview_wgc.close()
+        self._preview_wgc = None
+        self._preview_wgc_hwnd = None
+
     def toggle_recording(self):
         if self.recorder_logic.is_recording:
             # 停止
@@ -794,9 +1068,7 @@ class ScreenRecorderApp:
         # ウィンドウ追従のためのhwnd
         hwnd = None
         if self.source_var.get() == 'window':
-            idx = self.combo_target.current()
-            if idx >= 0 and idx < len(self.windows):
-                hwnd = self.windows[idx][0]
+            hwnd = self._sel_hwnd
 
         # ファイル名
         now = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -821,9 +1093,15 @@ class ScreenRecorderApp:
 
     def _update_region_tracking(self):
         """録画中または録画タブ表示中に赤枠を対象ウィンドウに追従させる"""
+        # タブ切り替えや録画開始から何度呼ばれてもループは1本だけにする
+        if self._region_tracking_id:
+            self.root.after_cancel(self._region_tracking_id)
+            self._region_tracking_id = None
+
         # 条件: 録画中 OR 録画タブ表示中
         is_in_record_tab = (self.notebook.select() == str(self.tab_record))
         is_recording = self.recorder_logic.is_recording
+        is_app_hidden = self.root.state() == 'iconic'
         
         # 実際に枠を表示するかどうか
         # show_region_var が OFF の場合は即座に消す
@@ -834,6 +1112,7 @@ class ScreenRecorderApp:
 
         if should_show:
             rect = self._get_target_rect()
+            self._tracked_target_rect = (time.time(), rect)
             
             # --- 赤枠表示の安定性ロジック ---
             is_stable = False
@@ -852,7 +1131,9 @@ class ScreenRecorderApp:
                 # 安定している場合のみ表示・更新
                 if not self.region_window:
                     self._show_recording_region(rect)
-                elif self.region_window.winfo_exists():
+                elif self._region_window_rect != rect and self.region_window.winfo_exists():
+                    # 前回反映した矩形から変わったときだけ枠を動かす
+                    self._region_window_rect = rect
                     thickness = self.REGION_THICKNESS
                     x = rect['left'] - thickness
                     y = rect['top'] - thickness
@@ -870,7 +1151,7 @@ class ScreenRecorderApp:
             # ------------------------------
             
             # 座標・サイズのUI自動更新
-            # ユーザーが入力中でない場合のみ更新する
+            # ユーザーが入力中でない場合のみ更新する (最小化中は誰も見ないので省く)
             try:
                 focused_widget = self.root.focus_get()
             except KeyError:
@@ -880,16 +1161,25 @@ class ScreenRecorderApp:
                 focused_widget = None
 
             input_widgets = [self.entry_x, self.entry_y, self.entry_w, self.entry_h]
-            if focused_widget not in input_widgets:
-                if rect:
-                    if self.geo_x.get() != rect['left']: self.geo_x.set(rect['left'])
-                    if self.geo_y.get() != rect['top']: self.geo_y.set(rect['top'])
-                    if self.geo_w.get() != rect['width']: self.geo_w.set(rect['width'])
-                    if self.geo_h.get() != rect['height']: self.geo_h.set(rect['height'])
+            if focused_widget in input_widgets:
+                # 入力中は値がずれるので、フォーカスが外れたら書き戻せるよう記録を破棄
+                self._last_pushed_geo = None
+            elif rect and not is_app_hidden:
+                geo = (rect['left'], rect['top'], rect['width'], rect['height'])
+                # 前回書き込んだ値と同じなら Tcl 変数への get/set を丸ごと省く
+                if geo != self._last_pushed_geo:
+                    self._set_geo_vars(geo)
 
         # 録画中または録画タブならループを継続
+        # 追従間隔は状況に応じて段階的に変える (動いている間だけ高頻度)
         if is_recording or is_in_record_tab:
-            self.root.after(50, self._update_region_tracking)
+            if is_app_hidden and not is_recording:
+                interval = self.REGION_TRACKING_COLD_MS
+            elif time.time() - self.last_rect_change_time < self.REGION_TRACKING_SETTLE_SEC:
+                interval = self.REGION_TRACKING_HOT_MS
+            else:
+                interval = self.REGION_TRACKING_WARM_MS
+            self._region_tracking_id = self.root.after(interval, self._update_region_tracking)
         else:
             self._hide_recording_region()
 
@@ -938,6 +1228,7 @@ class ScreenRecorderApp:
         if self.region_window: self._hide_recording_region()
         
         self.region_window = tk.Toplevel(self.root)
+        self._region_window_rect = rect
         self.region_window.overrideredirect(True)
         self.region_window.attributes("-topmost", True)
         self.region_window.attributes("-transparentcolor", "white")
@@ -981,6 +1272,7 @@ class ScreenRecorderApp:
         if self.region_window:
             self.region_window.destroy()
             self.region_window = None
+            self._region_window_rect = None
 
     def browse_save_dir(self):
         d = filedialog.askdirectory(initialdir=self.save_path_var.get())
@@ -1207,7 +1499,7 @@ class ScreenRecorderApp:
         if self.cap:
             self.cap.release()
             
-        self.cap = cv2.VideoCapture(path)
+        self.cap = open_video_capture(path)
         if not self.cap.isOpened():
             return
             
@@ -1298,14 +1590,15 @@ class ScreenRecorderApp:
 
     def display_frame(self, frame: np.ndarray):
         if frame is not None:
-            self.last_player_frame = frame.copy()
-            frame_to_disp = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            img = Image.fromarray(frame_to_disp)
+            # cap.read() は毎回新しい配列を返し、ここ以降で書き換えることもないのでコピー不要
+            self.last_player_frame = frame
         elif self.last_player_frame is not None:
-            frame_to_disp = cv2.cvtColor(self.last_player_frame, cv2.COLOR_BGR2RGB)
-            img = Image.fromarray(frame_to_disp)
+            frame = self.last_player_frame
         else:
             return
+        # BGR -> RGB は中間配列を作らず PIL のデコーダで並べ替える
+        h, w = frame.shape[:2]
+        img = Image.frombuffer("RGB", (w, h), np.ascontiguousarray(frame), "raw", "BGR", 0, 1)
         
         cw = self.player_canvas.winfo_width()
         ch = self.player_canvas.winfo_height()
@@ -1457,10 +1750,8 @@ class ScreenRecorderApp:
             self.preview_pan_x += dx
             self.preview_pan_y += dy
             self._preview_pan_start = (event.x, event.y)
-            # プレビューは _start_preview ループで更新されるが、即時反映させたい場合はここでも呼べる
-            # ただしキャプチャ処理が重いので、変数の更新だけにして次のループに任せるか、
-            # あるいは _start_preview を強制的に呼ぶか。
-            # ここでは滑らかさを優先してループ任せにする (interval=100ms なので少しカクつくかも)
+            # 再キャプチャは不要なので、表示中の画像の位置だけをすぐに動かす
+            self._reposition_preview()
 
     def _on_preview_middle_up(self, event):
         self._preview_panning = False
@@ -1470,8 +1761,8 @@ class ScreenRecorderApp:
         self.preview_pan_x = 0
         self.preview_pan_y = 0
         self.preview_zoom = 1.0
-        # 即時リセット
-        # self._start_preview() # may be too heavy
+        # 即時リセット (拡大率が変わっていれば次の画像で、パンだけならここで位置を戻す)
+        self._reposition_preview()
 
     def _on_preview_wheel(self, event):
         if event.num == 4 or event.delta > 0:
@@ -1486,6 +1777,9 @@ class ScreenRecorderApp:
         if mode == "player" and self.last_player_frame is not None:
             if not self.is_playing:
                 self.display_frame(None)
+        elif mode == "preview":
+            # 新しいサイズの画像が届くまでは今の画像を中央に置き直しておく
+            self._reposition_preview()
 
     def update_time_label(self, curr_frame):
         if hasattr(self, 'video_fps') and self.video_fps > 0:
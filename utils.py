@@ -106,6 +106,24 @@ def imwrite_jp(filename: str, img, params=None) -> bool:
         return False
 
 
+def open_video_capture(path: str) -> cv2.VideoCapture:
+    """動画を開く。可能ならFFmpegバックエンドのハードウェアデコードを使う.
+
+    OpenCV 4.5未満や対応デコーダが無い環境では通常のVideoCaptureにフォールバックする。
+    """
+    hw_prop = getattr(cv2, 'CAP_PROP_HW_ACCELERATION', None)
+    hw_any = getattr(cv2, 'VIDEO_ACCELERATION_ANY', None)
+    if hw_prop is not None and hw_any is not None:
+        try:
+            cap = cv2.VideoCapture(path, cv2.CAP_FFMPEG, [hw_prop, hw_any])
+            if cap.isOpened():
+                return cap
+            cap.release()
+        except Exception as e:
+            print(f"HW decode open error: {e}")
+    return cv2.VideoCapture(path)
+
+
 def ratio_value_from_str(rstr: str) -> float | None:
     """アスペクト比文字列（例: '16:9'）を数値に変換する."""
     try:
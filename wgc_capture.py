@@ -1,7 +1,7 @@
 import ctypes
 import numpy as np
 import threading
-from typing import Optional, Any
+from typing import Optional, Any, Tuple
 import time
 import cv2
 
@@ -31,9 +31,16 @@ class WGCCapture:
         self.frame_pool = None
         self.session = None
         
-        self.last_frame: Optional[np.ndarray] = None
+        self.last_frame: Optional[np.ndarray] = None # BGRA
+        # 新しいフレームが届くたびに加算される通し番号 (呼び出し側の変化検知用)
+        self.frame_seq = 0
         self.lock = threading.Lock()
         self.is_closed = False
+        # SoftwareBitmap からの読み出し用バッファ. サイズが変わるまで使い回す
+        self._staging_lock = threading.Lock()
+        self._staging_size = (0, 0)
+        self._staging_buffer = None
+        self._staging_data: Optional[bytearray] = None
         
         self._initialize_capture()
         
@@ -115,34 +122,57 @@ class WGCCapture:
                 # winsdk (Python) の async は .get_results() または .result で待機可能
                 bitmap = bitmap_task.get_results()
                 
-                with bitmap:
+                with bitmap, self._staging_lock:
                     # 2. BGRA8 -> BGR (NumPy)
                     # バッファコピー。SoftwareBitmap から直で NumPy に変換する
                     w, h = bitmap.pixel_width, bitmap.pixel_height
-                    buffer = Buffer(w * h * 4)
+                    if self._staging_size != (w, h):
+                        # 中継用のバッファはサイズが変わったときだけ確保し直す
+                        self._staging_buffer = Buffer(w * h * 4)
+                        self._staging_data = bytearray(w * h * 4)
+                        self._staging_size = (w, h)
+                    buffer = self._staging_buffer
+                    data = self._staging_data
                     bitmap.copy_to_buffer(buffer)
                     
                     # Buffer -> Array
                     reader = DataReader.from_buffer(buffer)
-                    data = bytearray(w * h * 4)
                     reader.read_bytes(data)
                     
                     # NumPy 配列化 (BGRA)
-                    np_frame = np.frombuffer(data, dtype=np.uint8).reshape((h, w, 4))
-                    # BGRA -> BGR
-                    bgr_frame = cv2.cvtColor(np_frame, cv2.COLOR_BGRA2BGR)
+                    # BGR への変換は取り出し側が必要なときだけ行う (到着ごとには変換しない)
+                    # copy するので data は次のフレームで再利用できる
+                    bgra_frame = np.frombuffer(data, dtype=np.uint8).reshape((h, w, 4)).copy()
                     
                     with self.lock:
-                        self.last_frame = bgr_frame
+                        self.last_frame = bgra_frame
+                        self.frame_seq += 1
         except Exception as e:
             # ループ中のエラーはノイズになるため print は控えるか一回だけ出す
             pass
 
     def get_latest_frame(self) -> Optional[np.ndarray]:
-        """最新のフレームを取得"""
+        """最新のフレームを BGR で取得"""
+        frame = self.get_latest_frame_bgra()
+        if frame is None:
+            return None
+        return cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
+
+    def get_latest_frame_bgra(self) -> Optional[np.ndarray]:
+        """最新のフレームを BGRA のまま取得 (変換不要な呼び出し側向け)"""
         with self.lock:
             return self.last_frame
 
+    def get_frame_since(self, last_seq: int) -> Tuple[Optional[np.ndarray], int]:
+        """last_seq より新しいフレームがあれば (BGRA フレーム, 通し番号) を返す.
+
+        新着がなければ (None, last_seq) を返す。フレームと番号は同じロック内で取り出すため食い違わない。
+        """
+        with self.lock:
+            if self.frame_seq > last_seq:
+                return self.last_frame, self.frame_seq
+            return None, last_seq
+
     def close(self):
         """リソース解放"""
         self.is_closed = True
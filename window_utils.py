@@ -2,6 +2,7 @@
 import ctypes
 import ctypes.wintypes
 import os
+import threading
 from typing import List, Tuple, Optional, Dict, Any
 
 import cv2
@@ -25,20 +26,86 @@ class BITMAPINFOHEADER(ctypes.Structure):
     ]
 
 
+class _GdiCache:
+    """PrintWindow 用のメモリ DC と DIB セクション. ウィンドウサイズが変わるまで使い回す."""
+
+    def __init__(self):
+        self.hdc_mem = None
+        self.hbmp = None
+        self.old_bmp = None
+        self.bits = None  # DIB セクションのピクセル先頭アドレス
+        self.size = (0, 0)
+
+
+# EnumWindows のコールバック型 (呼び出しごとに作り直さない)
+_WNDENUMPROC = ctypes.WINFUNCTYPE(ctypes.c_bool, ctypes.c_int, ctypes.c_int) if os.name == "nt" else None
+
+if os.name == "nt":
+    # 追従・プレビューで周期的に呼ぶ関数は、型を指定したうえで一度だけ解決しておく
+    # (ctypes.windll 側の共有関数オブジェクトの argtypes を書き換えないよう別インスタンスを使う)
+    _user32 = ctypes.WinDLL("user32")
+    _dwmapi = ctypes.WinDLL("dwmapi")
+
+    _IsIconic = _user32.IsIconic
+    _IsIconic.argtypes = [ctypes.wintypes.HWND]
+    _IsIconic.restype = ctypes.wintypes.BOOL
+
+    _IsWindowVisible = _user32.IsWindowVisible
+    _IsWindowVisible.argtypes = [ctypes.wintypes.HWND]
+    _IsWindowVisible.restype = ctypes.wintypes.BOOL
+
+    _GetWindowRect = _user32.GetWindowRect
+    _GetWindowRect.argtypes = [ctypes.wintypes.HWND, ctypes.POINTER(ctypes.wintypes.RECT)]
+    _GetWindowRect.restype = ctypes.wintypes.BOOL
+
+    _DwmGetWindowAttribute = _dwmapi.DwmGetWindowAttribute
+    _DwmGetWindowAttribute.argtypes = [ctypes.wintypes.HWND, ctypes.wintypes.DWORD, ctypes.c_void_p, ctypes.wintypes.DWORD]
+    _DwmGetWindowAttribute.restype = ctypes.c_long  # HRESULT
+
+
 class WindowUtils:
     """Windows APIを使用した操作をまとめたクラス."""
 
     # 定数
     DWMWA_EXTENDED_FRAME_BOUNDS = 9
+    # GetSystemMetrics: 仮想スクリーンの位置・サイズとモニター数
+    SM_DISPLAY_LAYOUT = (76, 77, 78, 79, 80) # SM_XVIRTUALSCREEN, SM_YVIRTUALSCREEN, SM_CXVIRTUALSCREEN, SM_CYVIRTUALSCREEN, SM_CMONITORS
     PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
 
     def __init__(self):
         self.sct = mss.mss()
+        self._monitor_cache: Optional[List[Dict[str, Any]]] = None
+        self._monitor_layout: Optional[Tuple[int, ...]] = None # キャッシュ作成時のディスプレイ構成
+        # capture_exclusive_window はプレビュー・録画の両スレッドから呼ばれるためロックで保護する
+        self._gdi_lock = threading.Lock()
+        self._gdi = _GdiCache()
+
+    def get_monitor_info(self, refresh: bool = False) -> List[Dict[str, Any]]:
+        """モニター情報を取得する.
+
+        モニター構成はめったに変わらないため結果をキャッシュする。
+        仮想スクリーンの範囲やモニター数が変わった場合は自動で取り直す。
+        一覧の更新操作など、確実に最新にしたいときは refresh=True を指定する。
+        """
+        layout = self._get_display_layout()
+        if refresh or self._monitor_cache is None or layout != self._monitor_layout:
+            if self._monitor_cache is not None:
+                # mss もインスタンス内で一覧をキャッシュしているため、作り直して再列挙させる
+                # (非公開属性には触れない)
+                try:
+                    self.sct.close()
+                except Exception:
+                    pass
+                self.sct = mss.mss()
+            # sct.monitors[0] は全画面結合なので除外する
+            self._monitor_cache = self.sct.monitors[1:]
+            self._monitor_layout = layout
+        return self._monitor_cache
 
-    def get_monitor_info(self) -> List[Dict[str, Any]]:
-        """モニター情報を取得する."""
-        # sct.monitors[0] は全画面結合なので除外する
-        return self.sct.monitors[1:]
+    def _get_display_layout(self) -> Tuple[int, ...]:
+        """ディスプレイ構成の変化検知用の値 (GetSystemMetrics のみなので軽量)."""
+        get_metrics = ctypes.windll.user32.GetSystemMetrics
+        return tuple(get_metrics(i) for i in self.SM_DISPLAY_LAYOUT)
 
     def enum_windows(self, filter_text: str = "") -> List[Tuple[Any, str]]:
         """可視ウィンドウの一覧を取得する.
@@ -49,39 +116,92 @@ class WindowUtils:
         Returns:
             List of (hwnd, title, process_name, pid) tuples, sorted by process name then title.
         """
-        windows = []
         filter_text = filter_text.lower() if filter_text else ""
+        user32 = ctypes.windll.user32
+
+        # コールバックは hwnd を集めるだけにして、1件ごとの Python 処理を最小限にする
+        hwnds: List[int] = []
 
         def enum_windows_proc(hwnd, lParam):
-            if ctypes.windll.user32.IsWindowVisible(hwnd):
-                length = ctypes.windll.user32.GetWindowTextLengthW(hwnd)
-                if length > 0:
-                    buff = ctypes.create_unicode_buffer(length + 1)
-                    ctypes.windll.user32.GetWindowTextW(hwnd, buff, length + 1)
-                    title = buff.value
-                    if title and title != "録画ツール":
-                        pname = self.get_process_name(hwnd)
-                        pid = ctypes.c_ulong()
-                        ctypes.windll.user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
-                        
-                        # 検索フィルタ適用 (タイトル または プロセス名)
-                        if not filter_text or (filter_text in title.lower()) or (filter_text in pname.lower()):
-                            windows.append((hwnd, title, pname, pid.value))
+            hwnds.append(hwnd)
             return True
 
-        ctypes.WNDENUMPROC = ctypes.WINFUNCTYPE(ctypes.c_bool, ctypes.c_int, ctypes.c_int)
-        ctypes.windll.user32.EnumWindows(ctypes.WNDENUMPROC(enum_windows_proc), 0)
+        user32.EnumWindows(_WNDENUMPROC(enum_windows_proc), 0)
+
+        # 列挙後にまとめてタイトル・プロセス情報を取得する
+        entries = [] # ((プロセス名小文字, タイトル小文字), (hwnd, title, pname, pid))
+        pname_cache: Dict[int, Tuple[str, str]] = {} # 同一プロセスの複数ウィンドウでプロセス名取得を省く
+        buff = ctypes.create_unicode_buffer(256)
+        pid = ctypes.c_ulong()
+        for hwnd in hwnds:
+            if not user32.IsWindowVisible(hwnd):
+                continue
+            length = user32.GetWindowTextLengthW(hwnd)
+            if length <= 0:
+                continue
+            if length + 1 > len(buff):
+                buff = ctypes.create_unicode_buffer(length + 1)
+            user32.GetWindowTextW(hwnd, buff, length + 1)
+            title = buff.value
+            if not title or title == "録画ツール":
+                continue
+
+            user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+            pid_value = pid.value
+            cached = pname_cache.get(pid_value)
+            if cached is None:
+                pname = self._get_process_name_by_pid(pid_value)
+                cached = (pname, pname.lower())
+                pname_cache[pid_value] = cached
+            pname, pname_lower = cached
+
+            # 小文字化は1ウィンドウにつき1回だけ行い、フィルタとソートで共用する
+            title_lower = title.lower()
+
+            # 検索フィルタ適用 (タイトル または プロセス名)
+            if not filter_text or (filter_text in title_lower) or (filter_text in pname_lower):
+                entries.append(((pname_lower, title_lower), (hwnd, title, pname, pid_value)))
         
         # ソート: プロセス名 -> タイトル
-        windows.sort(key=lambda x: (x[2].lower(), x[1].lower()))
+        entries.sort(key=lambda e: e[0])
         
-        return windows
+        return [window for _key, window in entries]
+
+    @staticmethod
+    def filter_windows(
+        windows: List[Tuple[Any, str, str, int]],
+        filter_text: str,
+        lowers: Optional[List[Tuple[str, str]]] = None,
+    ) -> List[Tuple[Any, str, str, int]]:
+        """enum_windows の結果を検索文字列 (タイトル または プロセス名) で絞り込む.
+
+        Args:
+            windows: enum_windows の戻り値
+            filter_text: 検索文字列
+            lowers: windows と同じ並びの (タイトル小文字, プロセス名小文字)。
+                    同じ一覧を何度も絞り込む場合に渡すと、毎回の小文字化を省ける。
+        """
+        filter_text = filter_text.lower() if filter_text else ""
+        if not filter_text:
+            return list(windows)
+        if lowers is None:
+            lowers = WindowUtils.lower_window_names(windows)
+        return [w for w, (title_lower, pname_lower) in zip(windows, lowers)
+                if (filter_text in title_lower) or (filter_text in pname_lower)]
+
+    @staticmethod
+    def lower_window_names(windows: List[Tuple[Any, str, str, int]]) -> List[Tuple[str, str]]:
+        """filter_windows 用に (タイトル小文字, プロセス名小文字) の一覧を作る."""
+        return [(title.lower(), pname.lower()) for _hwnd, title, pname, _pid in windows]
 
     def get_process_name(self, hwnd: Any) -> str:
         """hwndからプロセス名を取得する."""
         pid = ctypes.c_ulong()
         ctypes.windll.user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
-        
+        return self._get_process_name_by_pid(pid.value)
+
+    def _get_process_name_by_pid(self, pid: int) -> str:
+        """プロセスIDからプロセス名を取得する."""
         h_process = ctypes.windll.kernel32.OpenProcess(self.PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
         if h_process:
             size = ctypes.c_uint32(260)
@@ -96,7 +216,7 @@ class WindowUtils:
     def get_window_rect(self, hwnd: Any) -> Optional[Dict[str, int]]:
         """ウィンドウの正確な矩形を取得する (DWM使用)."""
         rect = ctypes.wintypes.RECT()
-        res = ctypes.windll.dwmapi.DwmGetWindowAttribute(
+        res = _DwmGetWindowAttribute(
             hwnd, self.DWMWA_EXTENDED_FRAME_BOUNDS, ctypes.byref(rect), ctypes.sizeof(rect)
         )
         if res == 0:
@@ -105,19 +225,29 @@ class WindowUtils:
             return {'top': rect.top, 'left': rect.left, 'width': w, 'height': h}
         else:
             # フォールバック
-            if ctypes.windll.user32.GetWindowRect(hwnd, ctypes.byref(rect)):
+            if _GetWindowRect(hwnd, ctypes.byref(rect)):
                 return {'top': rect.top, 'left': rect.left, 'width': rect.right - rect.left, 'height': rect.bottom - rect.top}
         return None
 
-    def get_window_borders(self, hwnd: Any) -> Dict[str, int]:
-        """ウィンドウの不可視枠（影など）のサイズを取得する."""
+    def is_window_showing(self, hwnd: Any) -> bool:
+        """ウィンドウが表示状態 (可視かつ最小化されていない) かどうか."""
+        return bool(_IsWindowVisible(hwnd)) and not _IsIconic(hwnd)
+
+    def get_window_borders(self, hwnd: Any, rect_visual: Optional[ctypes.wintypes.RECT] = None) -> Dict[str, int]:
+        """ウィンドウの不可視枠（影など）のサイズを取得する.
+
+        rect_visual に取得済みの DWM 矩形を渡すと DwmGetWindowAttribute を呼び直さない。
+        """
         rect_total = ctypes.wintypes.RECT()
         ctypes.windll.user32.GetWindowRect(hwnd, ctypes.byref(rect_total))
         
-        rect_visual = ctypes.wintypes.RECT()
-        res = ctypes.windll.dwmapi.DwmGetWindowAttribute(
-            hwnd, self.DWMWA_EXTENDED_FRAME_BOUNDS, ctypes.byref(rect_visual), ctypes.sizeof(rect_visual)
-        )
+        if rect_visual is None:
+            rect_visual = ctypes.wintypes.RECT()
+            res = ctypes.windll.dwmapi.DwmGetWindowAttribute(
+                hwnd, self.DWMWA_EXTENDED_FRAME_BOUNDS, ctypes.byref(rect_visual), ctypes.sizeof(rect_visual)
+            )
+        else:
+            res = 0
         
         if res == 0:
             return {
@@ -132,8 +262,22 @@ class WindowUtils:
 
     def set_window_position(self, hwnd: Any, x: int, y: int, width: int, height: int) -> bool:
         """ウィンドウの位置とサイズを変更する (視覚的な位置・サイズを指定)."""
-        # 補正値を計算
-        borders = self.get_window_borders(hwnd)
+        # DWM の視覚的な矩形は1回だけ読み、一致判定と枠の計算の両方に使う
+        rect_visual = ctypes.wintypes.RECT()
+        res = _DwmGetWindowAttribute(
+            hwnd, self.DWMWA_EXTENDED_FRAME_BOUNDS, ctypes.byref(rect_visual), ctypes.sizeof(rect_visual)
+        )
+        if res == 0:
+            # 既に指定どおりの位置・サイズなら SetWindowPos (と枠の計算) を省く
+            current = (rect_visual.left, rect_visual.top,
+                       rect_visual.right - rect_visual.left, rect_visual.bottom - rect_visual.top)
+            if current == (x, y, width, height):
+                return True
+            # 補正値を計算
+            borders = self.get_window_borders(hwnd, rect_visual)
+        else:
+            # DWM から取れなかった場合は従来どおり get_window_borders に任せる
+            borders = self.get_window_borders(hwnd)
         
         # 指定された視覚的な座標・サイズから、設定すべき実際のウィンドウ座標・サイズ（枠含む）を計算
         # Target Visual X = Target Total X + Border Left
@@ -182,45 +326,27 @@ class WindowUtils:
             visual_w = rect_visual['width']
             visual_h = rect_visual['height']
 
-            # DC作成
-            hdc_screen = ctypes.windll.user32.GetDC(0)
-            hdc_mem = ctypes.windll.gdi32.CreateCompatibleDC(hdc_screen)
-            hbmp = ctypes.windll.gdi32.CreateCompatibleBitmap(hdc_screen, total_w, total_h)
-            ctypes.windll.gdi32.SelectObject(hdc_mem, hbmp)
-
-            # PW_RENDERFULLCONTENT (2) で描画
-            ctypes.windll.user32.PrintWindow(hwnd, hdc_mem, 2)
-
-            # Bitmap から numpy 配列 (BGR) への変換
-            bi = BITMAPINFOHEADER()
-            bi.biSize = ctypes.sizeof(BITMAPINFOHEADER)
-            bi.biWidth = total_w
-            bi.biHeight = -total_h  # Top-down
-            bi.biPlanes = 1
-            bi.biBitCount = 32
-            bi.biCompression = 0 # BI_RGB
-
-            buffer = ctypes.create_string_buffer(total_w * total_h * 4)
-            ctypes.windll.gdi32.GetDIBits(hdc_mem, hbmp, 0, total_h, buffer, ctypes.byref(bi), 0)
-
-            # クリーンアップ
-            ctypes.windll.gdi32.DeleteObject(hbmp)
-            ctypes.windll.gdi32.DeleteDC(hdc_mem)
-            ctypes.windll.user32.ReleaseDC(0, hdc_screen)
-
-            # buffer -> numpy
-            raw_data = np.frombuffer(buffer, dtype=np.uint8)
-            frame_bgra = raw_data.reshape((total_h, total_w, 4))
-            frame_bgr = cv2.cvtColor(frame_bgra, cv2.COLOR_BGRA2BGR)
-            
             # 視覚的な矩形に合わせてクロップ (ズレと白線の解消)
             # offset が負になることは通常ないが、クリップしておく
             y1 = max(0, offset_y)
             y2 = min(total_h, y1 + visual_h)
             x1 = max(0, offset_x)
             x2 = min(total_w, x1 + visual_w)
-            
-            cropped = frame_bgr[y1:y2, x1:x2]
+
+            with self._gdi_lock:
+                # DC と DIB セクションはサイズが変わったときだけ作り直す
+                gdi = self._ensure_gdi_cache(total_w, total_h)
+                if gdi is None:
+                    return None
+
+                # PW_RENDERFULLCONTENT (2) で描画
+                ctypes.windll.user32.PrintWindow(hwnd, gdi.hdc_mem, 2)
+                ctypes.windll.gdi32.GdiFlush()
+
+                # DIB セクションのメモリを直接 numpy で参照し、クロップ範囲だけを BGR に変換してコピーする
+                pixels = (ctypes.c_ubyte * (total_w * total_h * 4)).from_address(gdi.bits)
+                frame_bgra = np.frombuffer(pixels, dtype=np.uint8).reshape((total_h, total_w, 4))
+                cropped = cv2.cvtColor(frame_bgra[y1:y2, x1:x2], cv2.COLOR_BGRA2BGR)
 
             # 白線対策: クロップ後の最上部1pxを強制的に黒で塗りつぶす
             # PrintWindowの境界アーティファクト対策 (視覚的な上端に適用)
@@ -232,6 +358,54 @@ class WindowUtils:
             print(f"Exclusive capture error: {e}")
             return None
 
+    def _ensure_gdi_cache(self, width: int, height: int) -> Optional[_GdiCache]:
+        """指定サイズのメモリ DC と DIB セクションを用意する (_gdi_lock 取得中に呼ぶこと)."""
+        gdi = self._gdi
+        if gdi.hdc_mem and gdi.size == (width, height):
+            return gdi
+        self._release_gdi(gdi)
+
+        bi = BITMAPINFOHEADER()
+        bi.biSize = ctypes.sizeof(BITMAPINFOHEADER)
+        bi.biWidth = width
+        bi.biHeight = -height  # Top-down
+        bi.biPlanes = 1
+        bi.biBitCount = 32
+        bi.biCompression = 0 # BI_RGB
+
+        hdc_screen = ctypes.windll.user32.GetDC(0)
+        try:
+            bits = ctypes.c_void_p()
+            hbmp = ctypes.windll.gdi32.CreateDIBSection(hdc_screen, ctypes.byref(bi), 0, ctypes.byref(bits), None, 0)
+            if not hbmp or not bits.value:
+                return None
+            gdi.hdc_mem = ctypes.windll.gdi32.CreateCompatibleDC(hdc_screen)
+            gdi.hbmp = hbmp
+        finally:
+            ctypes.windll.user32.ReleaseDC(0, hdc_screen)
+
+        gdi.old_bmp = ctypes.windll.gdi32.SelectObject(gdi.hdc_mem, gdi.hbmp)
+        gdi.bits = bits.value
+        gdi.size = (width, height)
+        return gdi
+
+    @staticmethod
+    def _release_gdi(gdi: _GdiCache):
+        """キャッシュしている GDI リソースを解放する."""
+        if gdi.hdc_mem:
+            if gdi.old_bmp:
+                ctypes.windll.gdi32.SelectObject(gdi.hdc_mem, gdi.old_bmp)
+            ctypes.windll.gdi32.DeleteDC(gdi.hdc_mem)
+        if gdi.hbmp:
+            ctypes.windll.gdi32.DeleteObject(gdi.hbmp)
+        gdi.hdc_mem = gdi.hbmp = gdi.old_bmp = gdi.bits = None
+        gdi.size = (0, 0)
+
+    def release_gdi_cache(self):
+        """capture_exclusive_window で使い回している DC / ビットマップを解放する."""
+        with self._gdi_lock:
+            self._release_gdi(self._gdi)
+
     def check_single_instance(self, mutex_name: str, window_title: str) -> bool:
         """二重起動チェック。既に起動している場合はTrueを返す. (戻り値の意味を逆転させないように注意) -> Falseなら起動可"""
         # Mutex作成